@@ -0,0 +1,211 @@
+"""
+Streaming CSV/XLSX exports of students and certificates.
+
+Rows are read with QuerySet.iterator(chunk_size=...) and written out as they
+arrive, so memory use does not grow with the table. XLSX files are written as a
+zip stream (minimal SpreadsheetML with inline strings), without loading the
+sheet into memory.
+"""
+from xml.sax.saxutils import escape
+import csv
+import re
+import zipfile
+
+from certificates.models import Certificate
+from students.models import Student
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+STUDENT_COLUMNS = [
+    ('Reference ID', lambda s: s.get_display_reference_id()),
+    ('Reference UUID', lambda s: s.reference_id),
+    ('Full Name', lambda s: s.full_name),
+    ("Father's Name", lambda s: s.fathers_name),
+    ('Email', lambda s: s.email_address),
+    ('Course', lambda s: s.get_course_name_display()),
+    ('Duration', lambda s: s.course_duration),
+    ('Mode', lambda s: s.get_mode_of_learning_display()),
+    ('Batch Schedule', lambda s: s.batch_schedule or ''),
+    ('Enrolled Date', lambda s: s.enrolled_date),
+    ('Instructor', lambda s: s.instructor_name),
+    ('Status', lambda s: s.get_approve_status_display()),
+    ('Certificate Number', lambda s: s.certificate.certificate_number if hasattr(s, 'certificate') else ''),
+    ('Applied At', lambda s: s.created_at.strftime('%Y-%m-%d %H:%M')),
+]
+
+CERTIFICATE_COLUMNS = [
+    ('Certificate Number', lambda c: c.certificate_number),
+    ('Issued Date', lambda c: c.issued_date),
+    ('Reference ID', lambda c: c.student.get_display_reference_id()),
+    ('Full Name', lambda c: c.student.full_name),
+    ('Email', lambda c: c.student.email_address),
+    ('Course', lambda c: c.student.get_course_name_display()),
+    ('Mode', lambda c: c.student.get_mode_of_learning_display()),
+    ('Status', lambda c: c.student.get_approve_status_display()),
+    ('Verification URL', lambda c: c.get_certificate_url()),
+]
+
+# Control characters are not allowed in XML 1.0
+XML_ILLEGAL_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Cells starting with these are run as formulas by spreadsheet apps
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def sanitize_cell(value):
+    """Cell text for an export, with a leading ' on values a spreadsheet would run as a formula"""
+    value = str(value)
+    if value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def filter_students(queryset, status='', course='', mode='', prefix=''):
+    """
+    Apply the status/course/mode filters of the applications page.
+
+    Unknown or empty values (e.g. status 'all') do not filter. prefix is the
+    lookup path to the student, e.g. 'student__' for certificates.
+    """
+    if status in dict(Student.APPROVAL_STATUS):
+        queryset = queryset.filter(**{f'{prefix}approve_status': status})
+    if course in dict(Student.COURSE_CHOICES):
+        queryset = queryset.filter(**{f'{prefix}course_name': course})
+    if mode in dict(Student.MODE_OF_LEARNING):
+        queryset = queryset.filter(**{f'{prefix}mode_of_learning': mode})
+    return queryset
+
+
+def get_export(kind, status='', course='', mode=''):
+    """Return (queryset, columns) for 'students' or 'certificates'"""
+    if kind == 'students':
+        queryset = filter_students(Student.objects.select_related('certificate'), status, course, mode)
+        return queryset.order_by('-created_at', '-pk'), STUDENT_COLUMNS
+    if kind == 'certificates':
+        queryset = filter_students(Certificate.objects.select_related('student'), status, course, mode,
+                                   prefix='student__')
+        return queryset.order_by('-issued_date', '-pk'), CERTIFICATE_COLUMNS
+    raise ValueError(f"Unknown export: {kind}")
+
+
+def iter_rows(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Header row, then one list of values per object, fetched chunk_size rows at a time"""
+    yield [header for header, _ in columns]
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        yield [value(obj) for _, value in columns]
+
+
+class Echo:
+    """File-like object that returns what is written, for csv.writer over a stream"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    """Yield CSV lines (UTF-8 BOM first, so Excel detects the encoding)"""
+    writer = csv.writer(Echo())
+    yield '\ufeff'
+    for row in rows:
+        yield writer.writerow([sanitize_cell(value) for value in row])
+
+
+class StreamBuffer:
+    """Write-only, unseekable buffer that zipfile writes into and the stream drains"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def xlsx_row(row):
+    cells = ''.join(
+        f'<c t="inlineStr"><is><t xml:space="preserve">{escape(XML_ILLEGAL_RE.sub("", sanitize_cell(value)))}</t></is></c>'
+        for value in row
+    )
+    return f'<row>{cells}</row>'
+
+
+def iter_xlsx(rows, sheet_name='Export', flush_every=500):
+    """Yield an .xlsx file as bytes, flushing the zip stream every flush_every rows"""
+    buffer = StreamBuffer()
+
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES)
+        zf.writestr('_rels/.rels', XLSX_ROOT_RELS)
+        zf.writestr('xl/workbook.xml', XLSX_WORKBOOK.format(sheet_name=escape(sheet_name)))
+        zf.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS)
+        yield buffer.drain()
+
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            for count, row in enumerate(rows, start=1):
+                sheet.write(xlsx_row(row).encode('utf-8'))
+                if count % flush_every == 0:
+                    yield buffer.drain()
+            sheet.write(b'</sheetData></worksheet>')
+
+    yield buffer.drain()
+
+
+def iter_export(kind, export_format, status='', course='', mode=''):
+    """Stream an export as str (csv) or bytes (xlsx) chunks"""
+    queryset, columns = get_export(kind, status, course, mode)
+    rows = iter_rows(queryset, columns)
+    if export_format == 'xlsx':
+        return iter_xlsx(rows, sheet_name=kind.capitalize())
+    return iter_csv(rows)
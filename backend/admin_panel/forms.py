@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth import get_user_model
+from django.core.validators import FileExtensionValidator
 
 User = get_user_model()
 
@@ -25,4 +26,21 @@ class EmailAuthenticationForm(AuthenticationForm):
     username = forms.EmailField(
         label='Email',
         widget=forms.EmailInput(attrs={'autofocus': True})
-    )
\ No newline at end of file
+    )
+
+
+class StudentImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label='Students CSV',
+        validators=[FileExtensionValidator(allowed_extensions=['csv'])],
+        help_text='One row per student, with the registration form field names as headers'
+    )
+    photos_zip = forms.FileField(
+        label='Photos ZIP',
+        validators=[FileExtensionValidator(allowed_extensions=['zip'])],
+        help_text='Archive holding the files named in the student_photo column'
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        label='Only validate, do not import'
+    )
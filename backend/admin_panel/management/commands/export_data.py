@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+import sys
+
+from admin_panel.exports import EXPORT_FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = 'Stream a students or certificates export to a CSV/XLSX file (or CSV to stdout)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=['students', 'certificates'])
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv', dest='export_format')
+        parser.add_argument('--status', default='', help='pending, accepted or rejected')
+        parser.add_argument('--course', default='', help='Course key, e.g. web_development')
+        parser.add_argument('--mode', default='', help='physical or online')
+        parser.add_argument('--output', default=None, help='File to write (default: stdout, CSV only)')
+
+    def handle(self, *args, **options):
+        export_format = options['export_format']
+        if export_format == 'xlsx' and not options['output']:
+            raise CommandError('--output is required for xlsx exports')
+
+        chunks = iter_export(options['kind'], export_format, status=options['status'],
+                             course=options['course'], mode=options['mode'])
+
+        if not options['output']:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+            return
+
+        if export_format == 'xlsx':
+            with open(options['output'], 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        else:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"Exported {options['kind']} to {options['output']}"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Index auth_user.email for admin_panel.backends.EmailBackend (login looks users up by email)"""
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS auth_user_email_idx ON auth_user (email);',
+            reverse_sql='DROP INDEX IF EXISTS auth_user_email_idx;',
+        ),
+    ]
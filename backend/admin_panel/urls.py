@@ -9,6 +9,10 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('students/', views.student_applications, name='student_applications'),
+    path('students/bulk-update-status/', views.bulk_update_student_status, name='bulk_update_student_status'),
+    path('students/export/', views.export_students, name='export_students'),
+    path('students/import/', views.import_students, name='import_students'),
+    path('certificates/export/', views.export_certificates, name='export_certificates'),
     path('students/<int:student_id>/', views.student_detail, name='student_detail'),
     path('students/<int:student_id>/update-status/', views.update_student_status, name='update_student_status'),
 ]
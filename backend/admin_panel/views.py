@@ -2,13 +2,23 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+import csv
+import zipfile
 
 from certificates.models import Certificate
 from students.forms import StudentApprovalForm
 from students.models import Student
-from .forms import AdminUserCreationForm, EmailAuthenticationForm
+from students.stats import get_status_counts
+from students.search import search_students
+from students.imports import import_students as run_student_import
+from .forms import AdminUserCreationForm, EmailAuthenticationForm, StudentImportForm
+from .exports import EXPORT_FORMATS, filter_students, iter_export
 from django.contrib.auth import get_user_model
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from core.pagination import KeysetPaginator, PAGE_SIZE_CHOICES, get_page_size
 
 User = get_user_model()
 
@@ -62,20 +72,16 @@ def dashboard(request):
         messages.error(request, 'You are not authorized to access this page.')
         return redirect('admin_panel:login')
 
-    total_users = User.objects.count()
-    admin_users = User.objects.filter(is_staff=True).count()
-    total_students = Student.objects.count()
-    pending_students = Student.objects.filter(approve_status='pending').count()
-    accepted_students = Student.objects.filter(approve_status='accepted').count()
-    rejected_students = Student.objects.filter(approve_status='rejected').count()
+    user_counts = User.objects.aggregate(total=Count('id'), admins=Count('id', filter=Q(is_staff=True)))
+    student_counts = get_status_counts()
 
     context = {
-        'total_users': total_users,
-        'admin_users': admin_users,
-        'total_students': total_students,
-        'pending_students': pending_students,
-        'accepted_students': accepted_students,
-        'rejected_students': rejected_students,
+        'total_users': user_counts['total'],
+        'admin_users': user_counts['admins'],
+        'total_students': student_counts['total'],
+        'pending_students': student_counts['pending'],
+        'accepted_students': student_counts['accepted'],
+        'rejected_students': student_counts['rejected'],
     }
 
     return render(request, 'admin_panel/dashboard.html', context)
@@ -88,23 +94,38 @@ def student_applications(request):
         return redirect('admin_panel:login')
 
     status_filter = request.GET.get('status', 'all')
+    course_filter = request.GET.get('course', '')
+    mode_filter = request.GET.get('mode', '')
+    search_query = request.GET.get('q', '').strip()
 
-    if status_filter == 'pending':
-        students = Student.objects.filter(approve_status='pending')
-    elif status_filter == 'accepted':
-        students = Student.objects.filter(approve_status='accepted')
-    elif status_filter == 'rejected':
-        students = Student.objects.filter(approve_status='rejected')
+    students = filter_students(Student.objects.all(), status_filter, course_filter, mode_filter)
+
+    if search_query:
+        # Best matches first, numbered pages
+        paginator = Paginator(search_students(students, search_query), get_page_size(request))
+        page = paginator.get_page(request.GET.get('page'))
     else:
-        students = Student.objects.all()
+        # Newest first, one page at a time
+        paginator = KeysetPaginator(students, 'created_at', get_page_size(request))
+        page = paginator.get_page(after=request.GET.get('after'), before=request.GET.get('before'))
+
+    # All four counters come from one cached aggregate
+    counts = get_status_counts()
 
     context = {
-        'students': students,
+        'students': page,
+        'page': page,
         'status_filter': status_filter,
-        'total_count': Student.objects.count(),
-        'pending_count': Student.objects.filter(approve_status='pending').count(),
-        'accepted_count': Student.objects.filter(approve_status='accepted').count(),
-        'rejected_count': Student.objects.filter(approve_status='rejected').count(),
+        'course_filter': course_filter,
+        'mode_filter': mode_filter,
+        'search_query': search_query,
+        'course_choices': Student.COURSE_CHOICES,
+        'mode_choices': Student.MODE_OF_LEARNING,
+        'page_size_choices': PAGE_SIZE_CHOICES,
+        'total_count': counts['total'],
+        'pending_count': counts['pending'],
+        'accepted_count': counts['accepted'],
+        'rejected_count': counts['rejected'],
     }
 
     return render(request, 'admin_panel/student_applications.html', context)
@@ -156,13 +177,13 @@ def update_student_status(request, student_id):
         new_status = request.POST.get('approve_status')
 
         if new_status in dict(Student.APPROVAL_STATUS):
-            # The email will be sent automatically via the model's save method
+            # Certificate generation and the status email are queued by the model's save method
             student.approve_status = new_status
-            student.save()  # This will trigger the status update email
+            student.save()
 
             return JsonResponse({
                 'success': True,
-                'message': 'Status updated successfully! Email notification sent to student.',
+                'message': 'Status updated successfully! Email notification queued for the student.',
                 'new_status': student.get_approve_status_display(),
                 'status_class': student.approve_status
             })
@@ -171,3 +192,96 @@ def update_student_status(request, student_id):
 
     return JsonResponse({'success': False, 'error': 'Invalid request'})
 
+
+
+@login_required
+def bulk_update_student_status(request):
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+
+    if request.method == 'POST' and request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        new_status = request.POST.get('approve_status')
+        student_ids = request.POST.getlist('student_ids')
+
+        if new_status not in dict(Student.APPROVAL_STATUS):
+            return JsonResponse({'success': False, 'error': 'Invalid status'})
+        if not student_ids or not all(student_id.isdigit() for student_id in student_ids):
+            return JsonResponse({'success': False, 'error': 'No students selected'})
+
+        # One transaction for all students, certificates and emails are sent as one background batch
+        students = Student.objects.filter(id__in=student_ids)
+        changed = Student.bulk_update_status(students, new_status)
+
+        return JsonResponse({
+            'success': True,
+            'message': f'{len(changed)} student(s) updated. Email notifications queued.',
+            'updated_ids': [student.id for student in changed],
+            'new_status': dict(Student.APPROVAL_STATUS)[new_status],
+            'status_class': new_status
+        })
+
+    return JsonResponse({'success': False, 'error': 'Invalid request'})
+
+
+@login_required
+def import_students(request):
+    if not request.user.is_staff:
+        messages.error(request, 'You are not authorized to access this page.')
+        return redirect('admin_panel:login')
+
+    result = None
+    if request.method == 'POST':
+        form = StudentImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            dry_run = form.cleaned_data['dry_run']
+            try:
+                result = run_student_import(form.cleaned_data['csv_file'], form.cleaned_data['photos_zip'],
+                                            dry_run=dry_run)
+            except (zipfile.BadZipFile, UnicodeDecodeError, csv.Error) as e:
+                messages.error(request, f'Could not read the uploaded files: {e}')
+            else:
+                verb = 'validated' if dry_run else 'imported'
+                messages.success(request, f'{result.created} student(s) {verb}, {result.failed} row(s) rejected.')
+    else:
+        form = StudentImportForm()
+
+    return render(request, 'admin_panel/import_students.html', {'form': form, 'result': result})
+
+
+def stream_export(request, kind):
+    """Stream a students/certificates export in ?format=csv|xlsx, honouring the list filters"""
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        export_format = 'csv'
+
+    response = StreamingHttpResponse(
+        iter_export(
+            kind,
+            export_format,
+            status=request.GET.get('status', ''),
+            course=request.GET.get('course', ''),
+            mode=request.GET.get('mode', ''),
+        ),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    filename = f"{kind}_{timezone.now().strftime('%Y%m%d_%H%M')}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+def export_students(request):
+    if not request.user.is_staff:
+        messages.error(request, 'You are not authorized to access this page.')
+        return redirect('admin_panel:login')
+
+    return stream_export(request, 'students')
+
+
+@login_required
+def export_certificates(request):
+    if not request.user.is_staff:
+        messages.error(request, 'You are not authorized to access this page.')
+        return redirect('admin_panel:login')
+
+    return stream_export(request, 'certificates')
@@ -0,0 +1,55 @@
+from django.db.models import Q
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.views import APIView
+
+from .models import Certificate
+from .serializers import BulkVerificationRequestSerializer, VerifiedCertificateSerializer
+
+
+class BulkVerificationView(APIView):
+    """
+    Verify a batch of certificates in one request.
+
+    POST {"certificate_numbers": [...], "verification_codes": [...]}
+
+    Every requested value is returned in order with "valid" and, when found, the
+    certificate's key fields. All lookups are resolved with a single query.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'certificate_verification'
+
+    def post(self, request):
+        serializer = BulkVerificationRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        certificate_numbers = serializer.validated_data['certificate_numbers']
+        verification_codes = serializer.validated_data['verification_codes']
+
+        certificates = Certificate.objects.select_related('student').filter(
+            Q(certificate_number__in=certificate_numbers) | Q(verification_code__in=verification_codes)
+        )
+        by_number = {}
+        by_code = {}
+        for certificate in certificates:
+            by_number[certificate.certificate_number] = certificate
+            by_code[certificate.verification_code] = certificate
+
+        results = []
+        for lookup_type, values, found in (
+                ('certificate_number', certificate_numbers, by_number),
+                ('verification_code', verification_codes, by_code),
+        ):
+            for value in values:
+                certificate = found.get(value)
+                valid = certificate is not None and certificate.student.approve_status == 'accepted'
+                results.append({
+                    'query': value,
+                    'type': lookup_type,
+                    'valid': valid,
+                    'certificate': VerifiedCertificateSerializer(certificate).data if valid else None,
+                })
+
+        return Response({'results': results})
@@ -0,0 +1,112 @@
+"""
+Certificate file responses: streaming with HTTP Range support, or offloaded to the
+front proxy with X-Accel-Redirect (nginx) / X-Sendfile (Apache, lighttpd).
+"""
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from urllib.parse import quote
+import re
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def parse_range_header(header, size):
+    """
+    Parse a single byte range header.
+
+    Returns:
+        (start, end) inclusive byte positions, None when the header should be
+        ignored (absent, malformed or multi-range), or False when unsatisfiable.
+    """
+    if not header:
+        return None
+
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def iter_file_range(file, start, length):
+    """Yield length bytes of file from start, closing it when done."""
+    try:
+        file.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = file.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def offload_response(field_file, filename):
+    """Let the front proxy send the file, Django only authorises the request."""
+    response = HttpResponse(content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+    mode = settings.CERTIFICATE_DOWNLOAD_OFFLOAD
+    if mode == 'x-accel-redirect':
+        # Quoted: legacy file names can contain spaces or non-ASCII characters
+        response['X-Accel-Redirect'] = f"{settings.CERTIFICATE_DOWNLOAD_ACCEL_PREFIX.rstrip('/')}/{quote(field_file.name)}"
+    else:
+        response['X-Sendfile'] = field_file.path
+    return response
+
+
+def certificate_file_response(request, field_file, filename, etag=None):
+    """
+    Build the download response for a stored certificate file.
+
+    The file is streamed rather than read into memory. Single byte ranges are
+    answered with 206 Partial Content so interrupted downloads can resume. When
+    etag is given, a Range request whose If-Range no longer matches gets the full file.
+    """
+    if settings.CERTIFICATE_DOWNLOAD_OFFLOAD:
+        return offload_response(field_file, filename)
+
+    file = field_file.open('rb')
+    size = field_file.size
+    byte_range = parse_range_header(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range is not None and if_range and if_range != etag:
+        byte_range = None
+
+    if byte_range is False:
+        file.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=True, filename=filename, content_type='application/pdf')
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(iter_file_range(file, start, length), status=206,
+                                         content_type='application/pdf')
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+import os
+from certificates.models import Certificate
+from certificates.services import CertificateService
+
+
+class Command(BaseCommand):
+    help = 'Regenerate certificate PDFs in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of worker processes (default: CPU count, 1 runs inline)')
+        parser.add_argument('--chunk-size', type=int, default=100,
+                            help='Number of certificates dispatched per chunk')
+        parser.add_argument('--checkpoint', default=None,
+                            help='JSON checkpoint file, an interrupted run resumes from it')
+        parser.add_argument('--reset', action='store_true',
+                            help='Ignore and overwrite an existing checkpoint')
+        parser.add_argument('--certificate-number', action='append', dest='certificate_numbers',
+                            help='Only regenerate these certificates (can be repeated)')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render certificates even when nothing shown on them has changed')
+
+    def handle(self, *args, **options):
+        queryset = Certificate.objects.all()
+        if options['certificate_numbers']:
+            queryset = queryset.filter(certificate_number__in=options['certificate_numbers'])
+
+        checkpoint = options['checkpoint']
+        if checkpoint and options['reset']:
+            if os.path.exists(checkpoint):
+                os.remove(checkpoint)
+
+        def progress(done, total, failed):
+            self.stdout.write(f'{done}/{total} processed, {failed} failed')
+
+        try:
+            result = CertificateService.regenerate_certificates(
+                queryset=queryset,
+                workers=options['workers'],
+                chunk_size=options['chunk_size'],
+                checkpoint_path=checkpoint,
+                progress=progress,
+                force=options['force'],
+            )
+        except ValueError as e:
+            raise CommandError(f"{e} (--reset)")
+
+        for certificate_id, error in result['failed'].items():
+            self.stdout.write(self.style.ERROR(f'Certificate {certificate_id}: {error}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Regenerated {result['succeeded']} of {result['processed']} certificates "
+            f"({result['skipped']} unchanged, skipped)"
+        ))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:00
+
+import certificates.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0002_certificate_verification_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='qr_code',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to=certificates.models.qr_code_upload_path),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='qr_code_key',
+            field=models.CharField(blank=True, editable=False, help_text='Hash of the URL encoded in the stored QR code', max_length=64),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0003_certificate_qr_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificateDownloadLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('first_fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('last_fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('fetch_count', models.PositiveIntegerField(default=0)),
+                ('certificate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='download_links', to='certificates.certificate')),
+            ],
+            options={
+                'verbose_name': 'Certificate download link',
+                'verbose_name_plural': 'Certificate download links',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
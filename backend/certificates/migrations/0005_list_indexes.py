@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0004_certificatedownloadlink'),
+        ('students', '0005_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['-issued_date', '-id'], name='certificate_issued_idx'),
+        ),
+    ]
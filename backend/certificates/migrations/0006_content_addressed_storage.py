@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:20
+
+import certificates.models
+import core.storage
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0005_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certificate',
+            name='certificate_file',
+            field=models.FileField(blank=True, max_length=255, null=True, storage=core.storage.content_storage, upload_to=certificates.models.certificate_upload_path, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf'])]),
+        ),
+        migrations.AlterField(
+            model_name='certificate',
+            name='qr_code',
+            field=models.ImageField(blank=True, editable=False, max_length=255, null=True, storage=core.storage.content_storage, upload_to=certificates.models.qr_code_upload_path),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0006_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='pdf_inputs_key',
+            field=models.CharField(blank=True, editable=False, help_text='Hash of the data and template the stored PDF was rendered from', max_length=64),
+        ),
+    ]
@@ -1,7 +1,9 @@
 # certificates/models.py
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from students.models import Student
-import os
 from django.core.validators import FileExtensionValidator
 from django.utils import timezone
 import random
@@ -12,12 +14,26 @@ from django.core.files import File
 import secrets
 from django.urls import reverse
 from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core import signing
+from datetime import datetime, timedelta
+import hashlib
+
+from core.storage import content_storage
+from .utils import get_certificate_inputs_key
+from .verification import invalidate_certificate
 
 
 def certificate_upload_path(instance, filename):
+    # Stored as certificates/ab/cd/<sha256>.<ext> by the content storage
     ext = filename.split('.')[-1]
-    filename = f"certificate.{ext}"
-    return os.path.join('certificates', instance.student.full_name.replace(' ', '_'), filename)
+    return f"certificates/certificate.{ext}"
+
+
+def qr_code_upload_path(instance, filename):
+    return 'qr_codes/qr_code.png'
+
 
 
 class Certificate(models.Model):
@@ -30,6 +46,8 @@ class Certificate(models.Model):
     issued_date = models.DateField(default=timezone.now)
     certificate_file = models.FileField(
         upload_to=certificate_upload_path,
+        storage=content_storage,
+        max_length=255,
         validators=[FileExtensionValidator(allowed_extensions=['pdf'])],
         blank=True,
         null=True
@@ -44,11 +62,35 @@ class Certificate(models.Model):
         help_text="Unique code for certificate verification"
     )
 
+    qr_code = models.ImageField(
+        upload_to=qr_code_upload_path,
+        storage=content_storage,
+        max_length=255,
+        blank=True,
+        null=True,
+        editable=False
+    )
+    qr_code_key = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="Hash of the URL encoded in the stored QR code"
+    )
+    pdf_inputs_key = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="Hash of the data and template the stored PDF was rendered from"
+    )
 
     class Meta:
         ordering = ['-issued_date']
         verbose_name = 'Certificate'
         verbose_name_plural = 'Certificates'
+        indexes = [
+            # Certificate list: newest first (core.pagination keyset order)
+            models.Index(fields=['-issued_date', '-id'], name='certificate_issued_idx'),
+        ]
 
     def __str__(self):
         return f"Certificate {self.certificate_number} - {self.student.full_name}"
@@ -89,20 +131,165 @@ class Certificate(models.Model):
         img.save(buffer, format='PNG')
         return buffer
 
+    def get_qr_code_key(self):
+        """Hash of the QR code input, changes when verification_code or SITE_URL changes"""
+        return hashlib.sha256(self.get_certificate_url().encode('utf-8')).hexdigest()
 
-    def save(self, *args, **kwargs):
+    def get_pdf_inputs_key(self):
+        """Hash of everything shown on the PDF, changes when the student, photo or template changes"""
+        return get_certificate_inputs_key(self)
+
+    def has_current_pdf(self, inputs_key=None):
+        """Whether the stored PDF exists and was rendered from the current inputs"""
+        if not self.certificate_file or not self.certificate_file.storage.exists(self.certificate_file.name):
+            return False
+        return self.pdf_inputs_key == (inputs_key or self.get_pdf_inputs_key())
+
+    def get_qr_code_png(self):
+        """
+        Return the QR code PNG bytes, generating it only when its URL has changed.
+
+        Looks in the cache first, then in the stored qr_code file. A missing or stale
+        image is generated once and stored for later calls.
+        """
+        key = self.get_qr_code_key()
+        cache_key = f"certificate_qr:{key}"
+
+        png = cache.get(cache_key)
+        if png is not None:
+            return png
+
+        if self.qr_code and self.qr_code_key == key:
+            try:
+                with self.qr_code.open('rb') as f:
+                    png = f.read()
+            except (FileNotFoundError, OSError):
+                png = None
+
+        if png is None:
+            png = self.generate_qr_code().getvalue()
+            if self.pk:
+                self.qr_code.save('qr_code.png', ContentFile(png), save=False)
+                self.qr_code_key = key
+                # Bump updated_at too, so get_etag/get_last_modified change with the stored QR code
+                self.updated_at = timezone.now()
+                # The verification snapshot is left alone, it does not include the QR code
+                Certificate.objects.filter(pk=self.pk).update(qr_code=self.qr_code.name, qr_code_key=key,
+                                                              updated_at=self.updated_at)
+
+        cache.set(cache_key, png, timeout=None)
+        return png
+
+
+    def create_download_link(self, email):
+        """Create a tracked, expiring download link for one recipient"""
+        return CertificateDownloadLink.objects.create(
+            certificate=self,
+            email=email,
+            expires_at=timezone.now() + timedelta(days=settings.CERTIFICATE_LINK_MAX_AGE_DAYS),
+        )
+
+    def get_last_modified(self):
+        """Latest change to anything shown on the certificate pages (certificate or student)"""
+        return max(self.updated_at, self.student.updated_at)
+
+    def get_etag(self):
+        """Strong ETag for the certificate pages and file, changes whenever their content can"""
+        fingerprint = ':'.join([
+            str(self.pk),
+            self.certificate_number,
+            self.verification_code,
+            self.certificate_file.name or '',
+            self.updated_at.isoformat(),
+            self.student.updated_at.isoformat(),
+        ])
+        return f'"{hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()}"'
+
+    def assign_identifiers(self):
+        """Fill in the certificate number, issued date and verification code if they are not set yet"""
         # Generate certificate number if it doesn't exist
         if not self.certificate_number:
             self.certificate_number = self.generate_certificate_number()
 
-        # Set issued_date if it doesn't exist
+        # Set issued_date if it doesn't exist (the field default is a datetime, keep the date that is stored)
         if not self.issued_date:
             self.issued_date = timezone.now().date()
+        elif isinstance(self.issued_date, datetime):
+            self.issued_date = timezone.localdate(self.issued_date)
 
         # Generate verification code if it doesn't exist
         if not self.verification_code:
             self.verification_code = self.generate_verification_code()
 
+    def save(self, *args, **kwargs):
+        self.assign_identifiers()
 
         super().save(*args, **kwargs)
 
+        # Drop the cached verification snapshot (also covers CertificateService.regenerate_certificate)
+        invalidate_certificate(self)
+
+
+class CertificateDownloadLink(models.Model):
+    """A signed download link emailed to one recipient, with fetch tracking"""
+    SIGNING_SALT = 'certificates.download-link'
+
+    certificate = models.ForeignKey(
+        Certificate,
+        on_delete=models.CASCADE,
+        related_name='download_links'
+    )
+    email = models.EmailField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    first_fetched_at = models.DateTimeField(blank=True, null=True)
+    last_fetched_at = models.DateTimeField(blank=True, null=True)
+    fetch_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Certificate download link'
+        verbose_name_plural = 'Certificate download links'
+
+    def __str__(self):
+        return f"Download link for {self.certificate.certificate_number} - {self.email}"
+
+    def get_token(self):
+        """Signed, timestamped token identifying this link"""
+        return signing.dumps(self.pk, salt=self.SIGNING_SALT, compress=True)
+
+    @classmethod
+    def from_token(cls, token):
+        """
+        Return the link for a token.
+
+        Raises:
+            signing.SignatureExpired: the token or the link has expired
+            signing.BadSignature: the token was not issued by this site
+            CertificateDownloadLink.DoesNotExist: the link or its certificate was deleted
+        """
+        pk = signing.loads(token, salt=cls.SIGNING_SALT,
+                           max_age=timedelta(days=settings.CERTIFICATE_LINK_MAX_AGE_DAYS))
+        link = cls.objects.select_related('certificate').get(pk=pk)
+        if link.expires_at <= timezone.now():
+            raise signing.SignatureExpired(f"Download link {pk} expired at {link.expires_at}")
+        return link
+
+    def get_absolute_url(self):
+        return f"{settings.SITE_URL}{reverse('certificates:download_link', kwargs={'token': self.get_token()})}"
+
+    def record_fetch(self):
+        """Count a download through this link"""
+        now = timezone.now()
+        CertificateDownloadLink.objects.filter(pk=self.pk).update(
+            fetch_count=models.F('fetch_count') + 1,
+            last_fetched_at=now,
+            first_fetched_at=Coalesce('first_fetched_at', models.Value(now)),
+        )
+
+
+@receiver(post_delete, sender=Certificate)
+def invalidate_deleted_certificate(sender, instance, **kwargs):
+    """Deleted certificates (including student CASCADE deletes) must stop verifying"""
+    invalidate_certificate(instance)
+
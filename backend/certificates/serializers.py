@@ -0,0 +1,43 @@
+from rest_framework import serializers
+from .models import Certificate
+
+MAX_BULK_VERIFICATION_ITEMS = 500
+
+
+class BulkVerificationRequestSerializer(serializers.Serializer):
+    certificate_numbers = serializers.ListField(
+        child=serializers.CharField(max_length=50), required=False, default=list
+    )
+    verification_codes = serializers.ListField(
+        child=serializers.CharField(max_length=32), required=False, default=list
+    )
+
+    def validate(self, attrs):
+        total = len(attrs['certificate_numbers']) + len(attrs['verification_codes'])
+        if total == 0:
+            raise serializers.ValidationError('Provide certificate_numbers and/or verification_codes.')
+        if total > MAX_BULK_VERIFICATION_ITEMS:
+            raise serializers.ValidationError(
+                f'At most {MAX_BULK_VERIFICATION_ITEMS} certificates can be verified per request.'
+            )
+        return attrs
+
+
+class VerifiedCertificateSerializer(serializers.ModelSerializer):
+    student_name = serializers.CharField(source='student.full_name')
+    course = serializers.CharField(source='student.get_course_name_display')
+    course_duration = serializers.CharField(source='student.course_duration')
+    mode_of_learning = serializers.CharField(source='student.get_mode_of_learning_display')
+    enrolled_date = serializers.DateField(source='student.enrolled_date')
+    verify_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Certificate
+        fields = [
+            'certificate_number', 'issued_date', 'student_name', 'course',
+            'course_duration', 'mode_of_learning', 'enrolled_date', 'verify_url',
+        ]
+
+    def get_verify_url(self, certificate):
+        # Public preview page, the same URL the certificate's QR code points to
+        return certificate.get_certificate_url()
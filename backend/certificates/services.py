@@ -1,10 +1,66 @@
-# certificates/services.py
 from .models import Certificate
 from .utils import generate_certificate_pdf
 from django.core.files.base import ContentFile
+from django.db import transaction
+from core.media_gc import find_referenced
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from . import workers as certificate_workers
+import multiprocessing
+import hashlib
+import json
 import os
 
 
+def get_regeneration_selection(queryset):
+    """Hash of the SQL that selects the certificates of a bulk regeneration."""
+    sql, params = queryset.order_by('pk').values('pk').query.sql_with_params()
+    return hashlib.sha256(f"{sql} {params!r}".encode('utf-8')).hexdigest()
+
+
+def load_regeneration_checkpoint(checkpoint_path, selection, force):
+    """
+    Read a bulk regeneration checkpoint, returning an empty one if the file does not exist.
+
+    Raises:
+        ValueError: the checkpoint was written for other certificates or another force setting
+    """
+    checkpoint = {'last_id': 0, 'failed': {}, 'selection': selection, 'force': force}
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            saved = json.load(f)
+        if saved.get('selection') != selection or saved.get('force', False) != force:
+            raise ValueError(
+                f"Checkpoint {checkpoint_path} was written for a different selection or --force setting, "
+                f"resume with the same arguments or reset it"
+            )
+        checkpoint.update(saved)
+    return checkpoint
+
+
+def save_regeneration_checkpoint(checkpoint_path, checkpoint):
+    """Atomically write a bulk regeneration checkpoint."""
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def make_process_pool(workers):
+    """
+    Process pool for certificate rendering, or None when a single worker is requested.
+
+    Spawned workers open their own DB connections instead of sharing the parent's.
+    """
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=certificate_workers.init_worker,
+    )
+
+
 class CertificateService:
     @staticmethod
     def create_certificate_for_student(student):
@@ -14,41 +70,174 @@ class CertificateService:
         if hasattr(student, 'certificate'):
             return student.certificate
 
-        # Create and save certificate first to generate certificate number and issued_date
+        # Prepare everything before writing: number, issued date, verification code and the PDF itself
         certificate = Certificate(student=student)
-        certificate.save()  # This will generate certificate number and set issued_date
+        certificate.assign_identifiers()
+        certificate.pdf_inputs_key = certificate.get_pdf_inputs_key()
+        pdf_content = generate_certificate_pdf(certificate)
 
+        # Then store the file and insert the row once
+        filename = f"certificate_{certificate.certificate_number}.pdf"
         try:
-            # Generate PDF content
-            pdf_content = generate_certificate_pdf(certificate)
+            with transaction.atomic():
+                certificate.certificate_file.save(filename, ContentFile(pdf_content), save=False)
+                certificate.save()
+        except Exception:
+            CertificateService.discard_certificate_file(certificate)
+            raise
+
+        return certificate
 
-            # Save PDF to certificate file field
-            filename = f"certificate_{certificate.certificate_number}.pdf"
-            certificate.certificate_file.save(filename, ContentFile(pdf_content))
+    @staticmethod
+    def discard_certificate_file(certificate):
+        """
+        Delete the PDF of a certificate whose insert was rolled back.
 
-            # Save again to update the file field
-            certificate.save()
-            return certificate
+        Files are content addressed and may be shared, so the file is only deleted when
+        no other row references it. (If an outer transaction rolls back later, the file
+        is left for gc_media.)
+        """
+        name = certificate.certificate_file.name
+        if not name or find_referenced([name]):
+            return
 
+        try:
+            certificate.certificate_file.storage.delete(name)
         except Exception as e:
-            # If PDF generation fails, delete the certificate and re-raise the exception
-            certificate.delete()
-            raise e
+            print(f"Error deleting certificate file {name}: {e}")
 
     @staticmethod
-    def regenerate_certificate(certificate):
-        """Regenerate certificate PDF"""
-        pdf_content = generate_certificate_pdf(certificate)
+    def regenerate_certificate(certificate, force=False):
+        """
+        Regenerate certificate PDF, unless nothing shown on it has changed.
 
-        # Delete old file if exists
-        if certificate.certificate_file:
-            if os.path.isfile(certificate.certificate_file.path):
-                os.remove(certificate.certificate_file.path)
+        Args:
+            certificate: Certificate model instance
+            force: Render even when the stored PDF is up to date
 
-        # Save new PDF
+        Returns:
+            bool: True if the PDF was rendered, False if the stored one was kept
+        """
+        inputs_key = certificate.get_pdf_inputs_key()
+        if not force and certificate.has_current_pdf(inputs_key):
+            return False
+
+        pdf_content = generate_certificate_pdf(certificate)
+
+        # Save new PDF (the old file may be shared with other rows, it is left in the content storage)
         filename = f"certificate_{certificate.certificate_number}.pdf"
-        certificate.certificate_file.save(filename, ContentFile(pdf_content))
+        certificate.certificate_file.save(filename, ContentFile(pdf_content), save=False)
+        certificate.pdf_inputs_key = inputs_key
         certificate.save()
 
-        return certificate
+        return True
+
+    @staticmethod
+    def create_certificates_for_students(student_ids, workers=None):
+        """
+        Create certificates for many accepted students over one process pool.
+
+        Args:
+            student_ids: Primary keys of the students
+            workers: Number of worker processes (defaults to the CPU count, capped at the batch size)
+
+        Returns:
+            dict: {student_id: error} for the students whose certificate could not be created
+        """
+        student_ids = list(student_ids)
+        workers = min(workers or os.cpu_count() or 1, len(student_ids) or 1)
+
+        executor = make_process_pool(workers)
+        try:
+            if executor:
+                outcomes = executor.map(certificate_workers.issue_certificate_for_student_id, student_ids)
+            else:
+                outcomes = map(certificate_workers.issue_certificate_for_student_id, student_ids)
+            return {student_id: error for student_id, error in outcomes if error}
+        finally:
+            if executor:
+                executor.shutdown()
+
+    @staticmethod
+    def regenerate_certificates(queryset=None, workers=None, chunk_size=100, checkpoint_path=None, progress=None,
+                                force=False):
+        """
+        Regenerate many certificates in parallel.
+
+        Certificates are processed in primary key order, one chunk at a time, over a
+        process pool. After every chunk the last processed id is written to the
+        checkpoint file so an interrupted run can resume where it stopped. A failing
+        certificate is recorded and does not stop the run; a resumed run retries the
+        recorded failures first. The checkpoint also records the selection (queryset)
+        and force, and resuming with different ones raises ValueError. Certificates
+        whose PDF is already up to date (same inputs key) are skipped unless force is set.
+
+        Args:
+            queryset: Certificates to regenerate (defaults to all)
+            workers: Number of worker processes (defaults to the CPU count, 1 runs inline)
+            chunk_size: Number of certificates fetched and dispatched per chunk
+            checkpoint_path: Optional JSON file used to resume an interrupted run
+            progress: Optional callable(done, total, failed) called after every chunk
+            force: Render every certificate, even unchanged ones
+
+        Returns:
+            dict: 'processed', 'succeeded', 'skipped' (unchanged) and 'failed' ({certificate_id: error})
+            for this run
+        """
+        if queryset is None:
+            queryset = Certificate.objects.all()
+        workers = workers or os.cpu_count() or 1
+
+        queryset = queryset.order_by('pk')
+        checkpoint = load_regeneration_checkpoint(checkpoint_path, get_regeneration_selection(queryset), force)
+
+        # Failures recorded by an earlier run (and still selected) are retried first
+        retry_ids = list(queryset.filter(
+            pk__in=[int(certificate_id) for certificate_id in checkpoint['failed']],
+            pk__lte=checkpoint['last_id'],
+        ).values_list('pk', flat=True))
+        total = len(retry_ids) + queryset.filter(pk__gt=checkpoint['last_id']).count()
+
+        result = {'processed': 0, 'succeeded': 0, 'skipped': 0, 'failed': {}}
+        executor = make_process_pool(workers)
+        regenerate = partial(certificate_workers.regenerate_certificate_by_id, force=force)
+
+        def run_chunk(ids):
+            if executor:
+                outcomes = executor.map(regenerate, ids)
+            else:
+                outcomes = map(regenerate, ids)
+
+            for certificate_id, error, rendered in outcomes:
+                result['processed'] += 1
+                if error:
+                    result['failed'][certificate_id] = error
+                    checkpoint['failed'][str(certificate_id)] = error
+                    continue
+
+                result['succeeded' if rendered else 'skipped'] += 1
+                checkpoint['failed'].pop(str(certificate_id), None)
+
+            if checkpoint_path:
+                save_regeneration_checkpoint(checkpoint_path, checkpoint)
+            if progress:
+                progress(result['processed'], total, len(result['failed']))
+
+        try:
+            for start in range(0, len(retry_ids), chunk_size):
+                run_chunk(retry_ids[start:start + chunk_size])
+
+            last_id = checkpoint['last_id']
+            while True:
+                ids = list(queryset.filter(pk__gt=last_id).values_list('pk', flat=True)[:chunk_size])
+                if not ids:
+                    break
+
+                last_id = ids[-1]
+                checkpoint['last_id'] = last_id
+                run_chunk(ids)
+        finally:
+            if executor:
+                executor.shutdown()
 
+        return result
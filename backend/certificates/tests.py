@@ -1,3 +1,241 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from datetime import date
+from unittest import mock
+import shutil
+import tempfile
 
-# Create your tests here.
+from students.models import Student
+
+from . import verification
+from .downloads import offload_response, parse_range_header
+from .models import Certificate
+from .services import CertificateService
+from .verification import LocalLRUCache, get_verified_certificate, local_cache
+
+# Keep the cache out of the query counts
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class ParseRangeHeaderTests(SimpleTestCase):
+    size = 1000
+
+    def parse(self, header):
+        return parse_range_header(header, self.size)
+
+    def test_no_header(self):
+        self.assertIsNone(self.parse(None))
+        self.assertIsNone(self.parse(''))
+
+    def test_single_range(self):
+        self.assertEqual(self.parse('bytes=0-499'), (0, 499))
+        self.assertEqual(self.parse(' bytes=500-999 '), (500, 999))
+
+    def test_open_ended_range(self):
+        self.assertEqual(self.parse('bytes=900-'), (900, 999))
+
+    def test_suffix_range(self):
+        self.assertEqual(self.parse('bytes=-100'), (900, 999))
+
+    def test_suffix_range_longer_than_file(self):
+        self.assertEqual(self.parse('bytes=-5000'), (0, 999))
+
+    def test_empty_suffix_range_is_unsatisfiable(self):
+        self.assertIs(self.parse('bytes=-0'), False)
+
+    def test_end_past_file_is_clamped(self):
+        self.assertEqual(self.parse('bytes=990-5000'), (990, 999))
+
+    def test_start_past_file_is_unsatisfiable(self):
+        self.assertIs(self.parse('bytes=1000-'), False)
+        self.assertIs(self.parse('bytes=1500-2000'), False)
+
+    def test_end_before_start_is_unsatisfiable(self):
+        self.assertIs(self.parse('bytes=500-100'), False)
+
+    def test_multi_range_is_ignored(self):
+        self.assertIsNone(self.parse('bytes=0-99,200-299'))
+        self.assertIsNone(self.parse('bytes=0-99, -100'))
+
+    def test_malformed_headers_are_ignored(self):
+        for header in ['bytes=-', 'bytes=abc-def', 'bytes=1-2-3', 'items=0-99', 'bytes 0-99', 'bytes=0.5-1']:
+            with self.subTest(header=header):
+                self.assertIsNone(self.parse(header))
+
+
+class OffloadResponseTests(SimpleTestCase):
+    def make_field_file(self, name):
+        return Certificate(certificate_file=name).certificate_file
+
+    @override_settings(CERTIFICATE_DOWNLOAD_OFFLOAD='x-accel-redirect',
+                       CERTIFICATE_DOWNLOAD_ACCEL_PREFIX='/protected-media/')
+    def test_accel_redirect_path_is_quoted(self):
+        response = offload_response(self.make_field_file('certificates/my certificate é.pdf'), 'certificate.pdf')
+        self.assertEqual(response['X-Accel-Redirect'],
+                         '/protected-media/certificates/my%20certificate%20%C3%A9.pdf')
+
+    @override_settings(CERTIFICATE_DOWNLOAD_OFFLOAD='x-accel-redirect',
+                       CERTIFICATE_DOWNLOAD_ACCEL_PREFIX='/protected-media/')
+    def test_accel_redirect_keeps_content_addressed_names(self):
+        name = 'certificates/ab/cd/abcd0123.pdf'
+        response = offload_response(self.make_field_file(name), 'certificate.pdf')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{name}')
+
+
+class LocalLRUCacheTests(SimpleTestCase):
+    def test_entries_expire_after_ttl(self):
+        lru = LocalLRUCache(maxsize=10, ttl=30)
+        with mock.patch.object(verification.time, 'monotonic', return_value=100):
+            lru.set('key', 'value')
+        with mock.patch.object(verification.time, 'monotonic', return_value=129):
+            self.assertEqual(lru.get('key'), 'value')
+        with mock.patch.object(verification.time, 'monotonic', return_value=131):
+            self.assertIsNone(lru.get('key'))
+        self.assertEqual(len(lru._data), 0)
+
+    def test_evicts_least_recently_used(self):
+        lru = LocalLRUCache(maxsize=2, ttl=30)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual((lru.get('a'), lru.get('c')), (1, 3))
+
+    def test_delete_and_clear(self):
+        lru = LocalLRUCache(maxsize=2, ttl=30)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.delete('a')
+        lru.delete('missing')
+        self.assertIsNone(lru.get('a'))
+        lru.clear()
+        self.assertIsNone(lru.get('b'))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VerificationCacheTests(TestCase):
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        storages = override_settings(STORAGES={
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'content': {'BACKEND': 'core.storage.ContentAddressedFileSystemStorage', 'OPTIONS': {'location': location}},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        })
+        storages.enable()
+        self.addCleanup(storages.disable)
+
+        cache.clear()
+        local_cache.clear()
+        self.addCleanup(local_cache.clear)
+
+        self.student = Student.objects.create(
+            full_name='Test Student',
+            fathers_name='Test Father',
+            address='Kathmandu',
+            enrolled_date=date(2025, 1, 1),
+            course_name='web_development',
+            course_duration='3 months',
+            mode_of_learning='online',
+            instructor_name='Instructor',
+            email_address='student@example.com',
+        )
+        self.certificate = Certificate.objects.create(student=self.student)
+
+    def lookup(self, certificate=None):
+        return get_verified_certificate(verification_code=(certificate or self.certificate).verification_code)
+
+    def assertCached(self):
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(self.lookup())
+
+    def assertNotCached(self):
+        with self.assertNumQueries(1):
+            self.lookup()
+
+    def commit(self, change):
+        """Run change, check the snapshot survives until commit, then run the on_commit callbacks"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            change()
+        self.assertCached()
+        for callback in callbacks:
+            callback()
+
+    def test_lookup_is_cached(self):
+        with self.assertNumQueries(1):
+            certificate = self.lookup()
+        self.assertEqual(certificate.certificate_number, self.certificate.certificate_number)
+        self.assertEqual(certificate.student.full_name, 'Test Student')
+        self.assertCached()
+
+        # The number and the code share the snapshot
+        with self.assertNumQueries(0):
+            by_number = get_verified_certificate(certificate_number=self.certificate.certificate_number)
+        self.assertEqual(by_number.verification_code, self.certificate.verification_code)
+
+    def test_shared_tier_serves_local_misses(self):
+        self.lookup()
+        local_cache.clear()
+        self.assertCached()
+
+    def test_unknown_code(self):
+        self.assertIsNone(get_verified_certificate(verification_code='missing'))
+
+    def test_certificate_save_invalidates_on_commit(self):
+        self.lookup()
+        self.commit(self.certificate.save)
+        self.assertNotCached()
+
+    def test_regenerate_invalidates(self):
+        self.lookup()
+        with mock.patch('certificates.services.generate_certificate_pdf', return_value=b'%PDF-1.4'):
+            self.commit(lambda: CertificateService.regenerate_certificate(self.certificate, force=True))
+        self.assertNotCached()
+        self.assertEqual(self.lookup().certificate_file.name, self.certificate.certificate_file.name)
+
+    def test_student_edit_invalidates(self):
+        self.lookup()
+
+        def rename():
+            self.student.full_name = 'Renamed Student'
+            self.student.save()
+
+        self.commit(rename)
+        self.assertEqual(self.lookup().student.full_name, 'Renamed Student')
+
+    def test_student_edit_outside_snapshot_keeps_it(self):
+        self.lookup()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.email_address = 'new@example.com'
+            self.student.save()
+        self.assertCached()
+
+    def test_bulk_status_update_invalidates(self):
+        self.lookup()
+        self.commit(lambda: Student.bulk_update_status([self.student], 'rejected'))
+        self.assertEqual(self.lookup().student.approve_status, 'rejected')
+
+    def test_student_delete_invalidates(self):
+        self.lookup()
+        self.commit(self.student.delete)
+        self.assertIsNone(self.lookup())
+
+    def test_replaced_certificate_does_not_match_old_pointer(self):
+        old = self.certificate
+        self.lookup()
+        with self.captureOnCommitCallbacks(execute=True):
+            old.delete()
+            self.certificate = Certificate.objects.create(student=self.student)
+
+        self.assertIsNone(self.lookup(old))
+        self.assertEqual(self.lookup().certificate_number, self.certificate.certificate_number)
+        self.assertIsNone(self.lookup(old))
+
+    def test_qr_code_generation_keeps_snapshot(self):
+        self.lookup()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certificate.get_qr_code_png()
+        self.certificate.refresh_from_db()
+        self.assertTrue(self.certificate.qr_code)
+        self.assertCached()
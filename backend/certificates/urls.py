@@ -1,6 +1,7 @@
 # certificates/urls.py
 from django.urls import path
 from . import views
+from . import api
 
 app_name = 'certificates'
 
@@ -12,6 +13,9 @@ urlpatterns = [
 
     path('preview/<str:verification_code>/', views.certificate_preview, name='certificate_preview'),
     path('download/<str:verification_code>/', views.download_certificate, name='download_certificate'),
+    path('link/<str:token>/', views.download_certificate_link, name='download_link'),
+
+    path('api/verify/', api.BulkVerificationView.as_view(), name='bulk_verify'),
 
 ]
 
@@ -9,11 +9,25 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
 from reportlab.platypus import Table, TableStyle
+from reportlab.lib.utils import ImageReader
 from django.utils import timezone
 from django.conf import settings
 from datetime import datetime
+from io import BytesIO
+from PyPDF2 import PdfReader, PdfWriter
+from PyPDF2.generic import ArrayObject, ContentStream, NameObject
+import threading
+import hashlib
+import json
 import os
 
+# Bump when the layout or fixed wording of the certificate changes, so that
+# regeneration re-renders certificates whose data did not change
+CERTIFICATE_TEMPLATE_VERSION = 1
+
+# Images drawn on certificates, hashed into every certificate's inputs key
+CERTIFICATE_ASSETS = ['header.jpeg', 'footer.jpeg', 'profile.jpg']
+
 
 def get_asset_path(filename):
     """Get absolute path to asset file"""
@@ -21,34 +35,102 @@ def get_asset_path(filename):
     return os.path.join(assets_dir, filename)
 
 
+class ImageAssetRegistry:
+    """
+    Process-wide cache of the header, footer and default profile images.
+
+    Each asset is opened and validated once and kept as an ImageReader, which
+    canvas.drawImage accepts directly.
+    """
+
+    def __init__(self):
+        self._assets = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, filename):
+        """Return the ImageReader for filename, or None if it is missing or unreadable."""
+        with self._lock:
+            if filename in self._assets:
+                self.hits += 1
+                return self._assets[filename]
+
+            self.misses += 1
+            asset = self._load(filename)
+            self._assets[filename] = asset
+            return asset
+
+    def _load(self, filename):
+        path = get_asset_path(filename)
+
+        if not os.path.exists(path):
+            print(f"Asset image not found at: {path}")
+            return None
+
+        try:
+            reader = ImageReader(path)
+            reader.getSize()  # Fails early on a corrupt image
+        except Exception as e:
+            print(f"Error loading asset image {path}: {e}")
+            return None
+
+        return reader
+
+    def stats(self):
+        """Return hit/miss counters and the number of assets loaded."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'loaded': sum(1 for asset in self._assets.values() if asset is not None),
+            }
+
+    def clear(self):
+        """Forget all cached assets and reset the counters."""
+        with self._lock:
+            self._assets.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+image_assets = ImageAssetRegistry()
+
+
 def draw_header(c, page_width, page_height):
     """Draw header image at the top of the page."""
-    header_image_path = get_asset_path('header.jpeg')
+    header_image = image_assets.get('header.jpeg')
 
-    # Check if header image exists, if not, skip drawing
-    if not os.path.exists(header_image_path):
-        print(f"Header image not found at: {header_image_path}")
+    # Skip drawing if the header image is missing
+    if header_image is None:
         return
 
     header_img_width, header_img_height = 600, 120
     x_top = (page_width - header_img_width) / 2
     y_top = page_height - header_img_height - 2  # margin from top
-    c.drawImage(header_image_path, x_top, y_top, header_img_width, header_img_height)
+    c.drawImage(header_image, x_top, y_top, header_img_width, header_img_height)
 
 
 def draw_footer(c, page_width):
     """Draw footer image at the bottom of the page."""
-    footer_image_path = get_asset_path('footer.jpeg')
+    footer_image = image_assets.get('footer.jpeg')
 
-    # Check if footer image exists, if not, skip drawing
-    if not os.path.exists(footer_image_path):
-        print(f"Footer image not found at: {footer_image_path}")
+    # Skip drawing if the footer image is missing
+    if footer_image is None:
         return
 
     footer_img_width, footer_img_height = 600, 30
     x_bottom = (page_width - footer_img_width) / 2
     y_bottom = 2  # margin from bottom
-    c.drawImage(footer_image_path, x_bottom, y_bottom, footer_img_width, footer_img_height)
+    c.drawImage(footer_image, x_bottom, y_bottom, footer_img_width, footer_img_height)
+
+
+def get_certificate_photo(student):
+    """The stored photo drawn on the certificate (certificate photo, then original upload), or None"""
+    for photo in (student.certificate_photo, student.student_photo):
+        if photo and photo.storage.exists(photo.name):
+            return photo
+    return None
 
 
 def draw_top_sub_container(c, certificate, container_x, top_sub_y, container_width, top_sub_height):
@@ -70,22 +152,24 @@ def draw_top_sub_container(c, certificate, container_x, top_sub_y, container_wid
 
     # Student image (right side)
     student = certificate.student
-    default_image_path = get_asset_path('profile.jpg')
 
-    # Try to get student photo path if it exists
-    if student.student_photo and hasattr(student.student_photo, 'path') and os.path.exists(student.student_photo.path):
-        top_image_path = student.student_photo.path
-    else:
-        top_image_path = default_image_path
+    # Prefer the size-bounded certificate photo, then the original upload, then the cached default image
+    student_photo = None
+    photo = get_certificate_photo(student)
+    if photo:
+        # Read through the storage API, the file is not necessarily on local disk
+        with photo.open('rb') as f:
+            student_photo = ImageReader(BytesIO(f.read()))
+    default_image = None if student_photo else image_assets.get('profile.jpg')
 
     img_height = top_sub_height
     img_width = 120
     img_x = container_x + container_width - img_width + 30
     img_y = top_sub_y
 
-    if os.path.exists(top_image_path):
+    if student_photo or default_image:
         try:
-            c.drawImage(top_image_path, img_x, img_y, img_width, img_height,
+            c.drawImage(student_photo or default_image, img_x, img_y, img_width, img_height,
                         preserveAspectRatio=True, mask='auto')
         except Exception as e:
             print(f"Error drawing student image: {e}")
@@ -93,7 +177,7 @@ def draw_top_sub_container(c, certificate, container_x, top_sub_y, container_wid
             c.setFont("Helvetica", 10)
             c.drawString(img_x, img_y + img_height / 2, "Student Photo")
     else:
-        print(f"Warning: Image not found at {top_image_path}")
+        print(f"Warning: No student photo or default image for {student.full_name}")
         # Draw placeholder text
         c.setFont("Helvetica", 10)
         c.drawString(img_x, img_y + img_height / 2, "Student Photo")
@@ -199,18 +283,11 @@ def draw_body_container(c, certificate, container_x, container_y, container_widt
 
 def draw_mid_sub_container(c, certificate, container_x, container_y, container_width, mid_sub_height,
                            bottom_sub_height):
-    """Draws the middle sub-container with 4 stacked inner containers."""
+    """Draws the student-specific parts of the middle sub-container (intro and course table)."""
     student = certificate.student
 
-    # Base rectangle (background of mid sub-container)
-    c.setFillColor(white)
-    c.rect(container_x, container_y + bottom_sub_height, container_width, mid_sub_height, fill=0, stroke=0)
-
     # Top Y of mid-sub container
     top_y = container_y + bottom_sub_height + mid_sub_height
-
-    # Title container
-    draw_title_container(c, container_x, container_y, container_width, top_y)
     title_bottom_y = top_y - 30  # Spacing below title
 
     # Intro container
@@ -227,6 +304,22 @@ def draw_mid_sub_container(c, certificate, container_x, container_y, container_w
     body_bottom_y = title_bottom_y - 160  # Adjust based on content height
     draw_body_container(c, certificate, container_x, container_y + bottom_sub_height, container_width, body_bottom_y)
 
+
+def draw_static_mid_sub_container(c, container_x, container_y, container_width, mid_sub_height, bottom_sub_height):
+    """Draws the fixed parts of the middle sub-container (title and completion message)."""
+
+    # Base rectangle (background of mid sub-container)
+    c.setFillColor(white)
+    c.rect(container_x, container_y + bottom_sub_height, container_width, mid_sub_height, fill=0, stroke=0)
+
+    # Top Y of mid-sub container
+    top_y = container_y + bottom_sub_height + mid_sub_height
+
+    # Title container
+    draw_title_container(c, container_x, container_y, container_width, top_y)
+    title_bottom_y = top_y - 30  # Spacing below title
+    body_bottom_y = title_bottom_y - 160
+
     # Message container
     message_text = (
         "Upon successful completion of the program and fulfillment of all academic and disciplinary "
@@ -279,12 +372,26 @@ def draw_bottom_sub_container(c, container_x, container_y, container_width, bott
             c.line(text_x, line_y, text_x + text_width, line_y)
 
 
-def draw_main_container(c, certificate, container_x, container_y, container_width, container_height):
-    """Draws the main container and delegates sub-containers."""
+def get_container_layout(page_width, page_height):
+    """Return the main container geometry shared by the static and dynamic layers."""
+    margin_x = 70
+    container_height = page_height - 220  # Adjusted height
+    top_sub_height = 120
+    bottom_sub_height = 150
 
-    # Draw main container
-    c.setFillColor(white)
-    c.rect(container_x, container_y, container_width, container_height, fill=1, stroke=0)
+    return {
+        'container_x': margin_x,
+        'container_y': 90,
+        'container_width': page_width - 2 * margin_x,
+        'container_height': container_height,
+        'top_sub_height': top_sub_height,
+        'bottom_sub_height': bottom_sub_height,
+        'mid_sub_height': container_height - (top_sub_height + bottom_sub_height),
+    }
+
+
+def draw_main_container(c, certificate, container_x, container_y, container_width, container_height):
+    """Draws the student-specific sub-containers on top of the static layer."""
 
     # Sub-container heights
     top_sub_height = 120
@@ -297,69 +404,221 @@ def draw_main_container(c, certificate, container_x, container_y, container_widt
     # Draw sub-containers
     draw_top_sub_container(c, certificate, container_x, top_sub_y, container_width, top_sub_height)
     draw_mid_sub_container(c, certificate, container_x, container_y, container_width, mid_sub_height, bottom_sub_height)
-    draw_bottom_sub_container(c, container_x, container_y, container_width, bottom_sub_height)
-
-
-def generate_certificate_pdf(certificate):
-    """
-    Generate a PDF certificate in the format similar to the provided sample.
-
-    Args:
-        certificate: Certificate model instance
 
-    Returns:
-        bytes: PDF content as bytes
-    """
-    from io import BytesIO
 
-    # Create canvas in memory buffer
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
+def draw_static_layer(c, page_width, page_height):
+    """Draws everything that is identical on every certificate."""
+    layout = get_container_layout(page_width, page_height)
+    container_x = layout['container_x']
+    container_y = layout['container_y']
+    container_width = layout['container_width']
 
     # Draw header (with error handling)
     try:
-        draw_header(c, width, height)
+        draw_header(c, page_width, page_height)
     except Exception as e:
         print(f"Error drawing header: {e}")
         # Continue without header
 
-    # Main container dimensions
-    margin_x = 70
-    container_x = margin_x
-    container_y = 90
-    container_width = width - 2 * margin_x
-    container_height = height - 220  # Adjusted height
+    try:
+        # Main container background
+        c.setFillColor(white)
+        c.rect(container_x, container_y, container_width, layout['container_height'], fill=1, stroke=0)
+
+        draw_static_mid_sub_container(c, container_x, container_y, container_width,
+                                      layout['mid_sub_height'], layout['bottom_sub_height'])
+        draw_bottom_sub_container(c, container_x, container_y, container_width, layout['bottom_sub_height'])
+    except Exception as e:
+        print(f"Error drawing static container: {e}")
+
+    # Draw footer (with error handling)
+    try:
+        draw_footer(c, page_width)
+    except Exception as e:
+        print(f"Error drawing footer: {e}")
+        # Continue without footer
+
+
+_static_layer_pdf = None
+
+
+def get_static_layer():
+    """
+    Return the static certificate layer as PDF bytes.
+
+    The layer is rendered on first use and reused for the lifetime of the process,
+    so the header/footer images and fixed text are only drawn once.
+    """
+    global _static_layer_pdf
+
+    if _static_layer_pdf is None:
+        buffer = BytesIO()
+        c = canvas.Canvas(buffer, pagesize=A4, invariant=1)
+        width, height = A4
+        draw_static_layer(c, width, height)
+        c.save()
+        _static_layer_pdf = buffer.getvalue()
+        buffer.close()
+
+    return _static_layer_pdf
+
+
+def reset_static_layer():
+    """Drop the cached static layer and images so they are rebuilt on next use (e.g. after assets change)."""
+    global _static_layer_pdf, _assets_fingerprint
+    _static_layer_pdf = None
+    _assets_fingerprint = None
+    image_assets.clear()
+
+
+_assets_fingerprint = None
+
+
+def get_assets_fingerprint():
+    """Hash of the certificate template version and asset images, computed once per process"""
+    global _assets_fingerprint
+
+    if _assets_fingerprint is None:
+        hasher = hashlib.sha256(f"template:{CERTIFICATE_TEMPLATE_VERSION}".encode('utf-8'))
+        for filename in CERTIFICATE_ASSETS:
+            path = get_asset_path(filename)
+            hasher.update(filename.encode('utf-8'))
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    hasher.update(hashlib.sha256(f.read()).digest())
+        _assets_fingerprint = hasher.hexdigest()
+
+    return _assets_fingerprint
+
+
+def get_photo_hash(photo):
+    """sha256 of a stored photo's content"""
+    hasher = hashlib.sha256()
+    with photo.open('rb') as f:
+        for chunk in f.chunks():
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def get_certificate_inputs(certificate):
+    """Everything that appears on a certificate's PDF, as JSON-serialisable values"""
+    student = certificate.student
+    photo = get_certificate_photo(student)
+
+    return {
+        'assets': get_assets_fingerprint(),
+        'certificate_number': certificate.certificate_number,
+        # Dates as drawn
+        'issued_date': certificate.issued_date.strftime("%d-%m-%Y") if certificate.issued_date else None,
+        'full_name': student.full_name,
+        'fathers_name': student.fathers_name,
+        'address': student.address,
+        'enrolled_date': student.enrolled_date.strftime("%B %d, %Y") if student.enrolled_date else None,
+        'course': student.get_course_name_display(),
+        'course_duration': student.course_duration,
+        'mode_of_learning': student.get_mode_of_learning_display(),
+        'batch_schedule': student.batch_schedule or None,
+        'instructor_name': student.instructor_name,
+        'photo': get_photo_hash(photo) if photo else None,
+    }
+
+
+def get_certificate_inputs_key(certificate):
+    """Hash of get_certificate_inputs, equal keys render byte-identical PDFs"""
+    inputs = json.dumps(get_certificate_inputs(certificate), sort_keys=True, default=str)
+    return hashlib.sha256(inputs.encode('utf-8')).hexdigest()
+
+
+def rename_page_resources(page, reader, suffix):
+    """
+    Append suffix to the names of a page's fonts, images and other resources.
+
+    merge_page gives resources that clash with the background page random (uuid)
+    names; renaming them beforehand keeps the merged PDF deterministic.
+    """
+    resources = page['/Resources'].get_object()
+    rename = {}
+    for category in list(resources.keys()):
+        entries = resources.raw_get(category).get_object()
+        if not hasattr(entries, 'keys'):
+            continue  # e.g. /ProcSet is an array
+        for key in list(entries.keys()):
+            new_key = NameObject(f"{key}{suffix}")
+            entries[new_key] = entries.raw_get(key)
+            del entries[key]
+            rename[key] = new_key
+
+    content = ContentStream(page.get_contents(), reader)
+    for operands, _operator in content.operations:
+        for i, operand in enumerate(operands):
+            if isinstance(operand, NameObject):
+                operands[i] = rename.get(operand, operand)
+    page[NameObject('/Contents')] = content
+
+
+def render_dynamic_layer(certificate):
+    """Render only the student-specific fields of a certificate as PDF bytes."""
+    buffer = BytesIO()
+    # invariant: no creation date or random document id, the same inputs give the same bytes
+    c = canvas.Canvas(buffer, pagesize=A4, invariant=1)
+    width, height = A4
+    layout = get_container_layout(width, height)
 
     # Draw main container
     try:
-        draw_main_container(c, certificate, container_x, container_y, container_width, container_height)
+        draw_main_container(c, certificate, layout['container_x'], layout['container_y'],
+                            layout['container_width'], layout['container_height'])
     except Exception as e:
         print(f"Error drawing main container: {e}")
         # Draw simple fallback certificate
-        c.setFont("Helvetica-Bold", 20)
-        c.drawString(100, height / 2, "CERTIFICATE OF COMPLETION")
         c.setFont("Helvetica", 12)
+        c.setFillColor(black)
         c.drawString(100, height / 2 - 30, f"This certifies that {certificate.student.full_name}")
         c.drawString(100, height / 2 - 50, f"has successfully completed the course.")
 
-    # Draw footer (with error handling)
-    try:
-        draw_footer(c, width)
-    except Exception as e:
-        print(f"Error drawing footer: {e}")
-        # Continue without footer
-
     # Add certificate number at the bottom
     c.setFont("Helvetica-Oblique", 8)
     c.setFillColor(lightgrey)
     c.drawString(70, 50, f"Certificate Number: {certificate.certificate_number}")
 
-    # Save the PDF
     c.save()
+    pdf_content = buffer.getvalue()
+    buffer.close()
+
+    return pdf_content
 
-    # Get PDF content from buffer
+
+def generate_certificate_pdf(certificate):
+    """
+    Generate a PDF certificate in the format similar to the provided sample.
+
+    The cached static layer (see get_static_layer) is used as the page background
+    and only the student-specific fields are rendered per certificate.
+
+    Args:
+        certificate: Certificate model instance
+
+    Returns:
+        bytes: PDF content as bytes
+    """
+    # Fresh reader for the background each time, merge_page mutates the page
+    page = PdfReader(BytesIO(get_static_layer())).pages[0]
+    dynamic_reader = PdfReader(BytesIO(render_dynamic_layer(certificate)))
+    dynamic_page = dynamic_reader.pages[0]
+    rename_page_resources(dynamic_page, dynamic_reader, '.dyn')
+    page.merge_page(dynamic_page)
+
+    # merge_page unions /ProcSet through a set, so its order depends on the hash seed; fix it
+    resources = page['/Resources'].get_object()
+    if '/ProcSet' in resources:
+        resources[NameObject('/ProcSet')] = ArrayObject(sorted(resources['/ProcSet'].get_object()))
+
+    writer = PdfWriter()
+    writer.add_page(page)
+
+    buffer = BytesIO()
+    writer.write(buffer)
     pdf_content = buffer.getvalue()
     buffer.close()
 
-    return pdf_content
\ No newline at end of file
+    return pdf_content
@@ -0,0 +1,196 @@
+"""
+Cached certificate lookups for the public verification pages.
+
+A denormalised snapshot of the fields those pages use is kept in a small
+in-process LRU in front of Django's cache, so repeated verification hits do not
+reach the database. Snapshots are stored under the student id, and the
+certificate number and verification code keys only point to it, so a change to
+the certificate or its student drops the snapshot without looking anything up.
+That happens in whichever process makes the change (web worker, run_jobs or a
+management command). That only reaches the other processes through a shared
+cache backend (settings.CACHES, DJANGO_CACHE_URL); with it, the in-process copy
+of another worker lags by at most LOCAL_CACHE_TTL. With a process-local backend
+the shared tier is kept no longer than LOCAL_CACHE_TTL either, so stale
+snapshots still expire quickly.
+"""
+from collections import OrderedDict
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+import threading
+import time
+
+CACHE_TIMEOUT = 60 * 60  # seconds in Django's cache (when it is shared between processes)
+LOCAL_CACHE_TTL = 30  # seconds in the per-process LRU
+LOCAL_CACHE_SIZE = 1024
+
+# The stored QR code is not part of the snapshot, generating it does not change the pages
+CERTIFICATE_FIELDS = [
+    'id', 'certificate_number', 'verification_code', 'issued_date', 'certificate_file',
+    'created_at', 'updated_at',
+]
+STUDENT_FIELDS = [
+    'id', 'full_name', 'fathers_name', 'enrolled_date', 'course_name', 'course_duration',
+    'mode_of_learning', 'batch_schedule', 'instructor_name', 'approve_status', 'created_at', 'updated_at',
+]
+
+
+class LocalLRUCache:
+    """Thread-safe, size-bounded LRU with a per-entry TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalLRUCache(LOCAL_CACHE_SIZE, LOCAL_CACHE_TTL)
+
+
+def get_cache_timeout():
+    """Timeout in Django's cache, no longer than the local TTL if that cache is per process too"""
+    if isinstance(caches['default'], LocMemCache):
+        return LOCAL_CACHE_TTL
+    return CACHE_TIMEOUT
+
+
+def _cache_key(certificate_number=None, verification_code=None):
+    """Key pointing from a certificate number or verification code to the student id"""
+    if certificate_number is not None:
+        return f"verification:number:{certificate_number}"
+    return f"verification:code:{verification_code}"
+
+
+def _snapshot_key(student_id):
+    return f"verification:student:{student_id}"
+
+
+def make_snapshot(certificate):
+    """Denormalise a certificate and its student into a plain, cacheable dict"""
+    snapshot = {'student': {}}
+    for field in CERTIFICATE_FIELDS:
+        value = getattr(certificate, field)
+        snapshot[field] = value.name if field == 'certificate_file' else value
+    for field in STUDENT_FIELDS:
+        snapshot['student'][field] = getattr(certificate.student, field)
+    return snapshot
+
+
+def snapshot_to_certificate(snapshot):
+    """Rebuild read-only Certificate/Student instances from a snapshot"""
+    from students.models import Student
+    from .models import Certificate
+
+    student_data = dict(snapshot['student'])
+    student = Student(**student_data)
+    student._state.adding = False
+
+    certificate_data = {key: value for key, value in snapshot.items() if key != 'student'}
+    certificate = Certificate(student=student, **certificate_data)
+    certificate._state.adding = False
+    return certificate
+
+
+def get_verified_certificate(certificate_number=None, verification_code=None):
+    """
+    Look up a certificate by number or verification code through the verification cache.
+
+    Returns:
+        Certificate: read-only instance (with .student) built from the snapshot, or None
+    """
+    from .models import Certificate
+
+    key = _cache_key(certificate_number, verification_code)
+
+    snapshot = None
+    student_id = _cache_get(key)
+    if student_id is not None:
+        snapshot = _cache_get(_snapshot_key(student_id))
+        # A pointer outlives a deleted certificate, the student may have another one now
+        if snapshot is not None and not _snapshot_matches(snapshot, certificate_number, verification_code):
+            snapshot = None
+
+    if snapshot is None:
+        lookup = ({'certificate_number': certificate_number} if certificate_number is not None
+                  else {'verification_code': verification_code})
+        certificate = Certificate.objects.select_related('student').filter(**lookup).first()
+        if certificate is None:
+            return None
+
+        snapshot = make_snapshot(certificate)
+        entries = {
+            _cache_key(certificate_number=certificate.certificate_number): certificate.student_id,
+            _cache_key(verification_code=certificate.verification_code): certificate.student_id,
+            _snapshot_key(certificate.student_id): snapshot,
+        }
+        cache.set_many(entries, get_cache_timeout())
+        for entry_key, value in entries.items():
+            local_cache.set(entry_key, value)
+
+    return snapshot_to_certificate(snapshot)
+
+
+def _cache_get(key):
+    """Value from the local LRU, else from Django's cache (kept locally for next time)"""
+    value = local_cache.get(key)
+    if value is None:
+        value = cache.get(key)
+        if value is not None:
+            local_cache.set(key, value)
+    return value
+
+
+def _snapshot_matches(snapshot, certificate_number, verification_code):
+    if certificate_number is not None:
+        return snapshot['certificate_number'] == certificate_number
+    return snapshot['verification_code'] == verification_code
+
+
+def invalidate_certificate(certificate):
+    """Drop the cached snapshot of a certificate once the current transaction commits"""
+    invalidate_student_certificates([certificate.student_id])
+
+
+def invalidate_student_certificate(student):
+    """Drop the cached snapshot of the student's certificate, if there is one"""
+    invalidate_student_certificates([student.pk])
+
+
+def invalidate_student_certificates(student_ids):
+    """Drop the cached snapshots of the certificates of many students (no query needed)"""
+    keys = [_snapshot_key(student_id) for student_id in student_ids]
+
+    def invalidate():
+        cache.delete_many(keys)
+        for key in keys:
+            local_cache.delete(key)
+
+    transaction.on_commit(invalidate)
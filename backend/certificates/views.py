@@ -1,19 +1,66 @@
 # certificates/views.py
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import HttpResponse, Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from students.models import Student
-from .models import Certificate
+from .models import Certificate, CertificateDownloadLink
 from .services import CertificateService
+from .downloads import certificate_file_response
+from .verification import get_verified_certificate
+from core.pagination import KeysetPaginator, PAGE_SIZE_CHOICES, get_page_size
+from django.core import signing
 import base64
 
 
+def conditional_certificate_response(request, certificate):
+    """Return a 304/412 response if the client's cached copy is still valid, else None"""
+    response = get_conditional_response(
+        request,
+        etag=certificate.get_etag(),
+        last_modified=int(certificate.get_last_modified().timestamp()),
+    )
+    if response is not None:
+        set_certificate_validators(response, certificate)
+    return response
+
+
+def set_certificate_validators(response, certificate):
+    """Add ETag and Last-Modified headers so clients can revalidate"""
+    response['ETag'] = certificate.get_etag()
+    response['Last-Modified'] = http_date(certificate.get_last_modified().timestamp())
+    return response
+
+
 @login_required
 def certificate_list(request):
-    """View all certificates (admin only)"""
-    certificates = Certificate.objects.all().select_related('student')
+    """View all certificates (admin only), newest first one page at a time"""
+    status_filter = request.GET.get('status', '')
+    course_filter = request.GET.get('course', '')
+    mode_filter = request.GET.get('mode', '')
+
+    certificates = Certificate.objects.select_related('student')
+    if status_filter in dict(Student.APPROVAL_STATUS):
+        certificates = certificates.filter(student__approve_status=status_filter)
+    if course_filter in dict(Student.COURSE_CHOICES):
+        certificates = certificates.filter(student__course_name=course_filter)
+    if mode_filter in dict(Student.MODE_OF_LEARNING):
+        certificates = certificates.filter(student__mode_of_learning=mode_filter)
+
+    paginator = KeysetPaginator(certificates, 'issued_date', get_page_size(request))
+    page = paginator.get_page(after=request.GET.get('after'), before=request.GET.get('before'))
+
     return render(request, 'certificates/certificate_list.html', {
-        'certificates': certificates
+        'certificates': page,
+        'page': page,
+        'status_filter': status_filter,
+        'course_filter': course_filter,
+        'mode_filter': mode_filter,
+        'status_choices': Student.APPROVAL_STATUS,
+        'course_choices': Student.COURSE_CHOICES,
+        'mode_choices': Student.MODE_OF_LEARNING,
+        'page_size_choices': PAGE_SIZE_CHOICES,
     })
 
 
@@ -28,19 +75,32 @@ def certificate_detail(request, certificate_id):
 
 def view_certificate_public(request, certificate_number):
     """Public view for certificate verification"""
-    certificate = get_object_or_404(Certificate, certificate_number=certificate_number)
-    return render(request, 'certificates/certificate_public.html', {
+    certificate = get_verified_certificate(certificate_number=certificate_number)
+    if certificate is None:
+        raise Http404("Certificate not found")
+
+    not_modified = conditional_certificate_response(request, certificate)
+    if not_modified:
+        return not_modified
+
+    response = render(request, 'certificates/certificate_public.html', {
         'certificate': certificate
     })
+    return set_certificate_validators(response, certificate)
 
 
 def certificate_preview(request, verification_code):
     """View for certificate preview and download"""
-    certificate = get_object_or_404(Certificate, verification_code=verification_code)
+    certificate = get_verified_certificate(verification_code=verification_code)
+    if certificate is None:
+        raise Http404("Certificate not found")
+
+    not_modified = conditional_certificate_response(request, certificate)
+    if not_modified:
+        return not_modified
 
     # Generate QR code as base64 for embedding in HTML
-    qr_buffer = certificate.generate_qr_code()
-    qr_base64 = base64.b64encode(qr_buffer.getvalue()).decode()
+    qr_base64 = base64.b64encode(certificate.get_qr_code_png()).decode()
 
     context = {
         'certificate': certificate,
@@ -48,16 +108,42 @@ def certificate_preview(request, verification_code):
         'qr_code_base64': qr_base64,
     }
 
-    return render(request, 'certificates/preview.html', context)
+    response = render(request, 'certificates/preview.html', context)
+    return set_certificate_validators(response, certificate)
 
 
 def download_certificate(request, verification_code):
     """View for downloading certificate"""
-    certificate = get_object_or_404(Certificate, verification_code=verification_code)
+    certificate = get_verified_certificate(verification_code=verification_code)
+    if certificate is None:
+        raise Http404("Certificate not found")
 
     if certificate.certificate_file:
-        response = HttpResponse(certificate.certificate_file.read(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="certificate_{certificate.certificate_number}.pdf"'
-        return response
+        not_modified = conditional_certificate_response(request, certificate)
+        if not_modified:
+            return not_modified
+
+        filename = f"certificate_{certificate.certificate_number}.pdf"
+        response = certificate_file_response(request, certificate.certificate_file, filename,
+                                             etag=certificate.get_etag())
+        return set_certificate_validators(response, certificate)
     else:
         return HttpResponse("Certificate file not found", status=404)
+
+
+def download_certificate_link(request, token):
+    """Resolve an emailed download link, record the fetch and serve the certificate"""
+    try:
+        link = CertificateDownloadLink.from_token(token)
+    except signing.SignatureExpired:
+        return HttpResponse("This download link has expired", status=410)
+    except (signing.BadSignature, CertificateDownloadLink.DoesNotExist):
+        raise Http404("Download link not found")
+
+    response = download_certificate(request, link.certificate.verification_code)
+
+    # Only count fetches that send the file (or part of it), not 304 revalidations or errors
+    if request.method == 'GET' and response.status_code in (200, 206):
+        link.record_fetch()
+
+    return response
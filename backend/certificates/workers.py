@@ -0,0 +1,41 @@
+"""
+Process pool entry points for bulk certificate work.
+
+Spawned workers import this module before Django is configured, so it must not
+import models at module level.
+"""
+
+
+def init_worker():
+    """Set up Django in a freshly spawned pool worker."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def regenerate_certificate_by_id(certificate_id, force=False):
+    """Regenerate one certificate, returning (certificate_id, error or None, whether the PDF was rendered)."""
+    from .models import Certificate
+    from .services import CertificateService
+
+    try:
+        certificate = Certificate.objects.select_related('student').get(pk=certificate_id)
+        rendered = CertificateService.regenerate_certificate(certificate, force=force)
+        return certificate_id, None, rendered
+    except Exception as e:
+        return certificate_id, f"{type(e).__name__}: {e}", False
+
+
+def issue_certificate_for_student_id(student_id):
+    """Create the certificate for one accepted student, returning (student_id, error or None)."""
+    from students.models import Student
+    from .services import CertificateService
+
+    try:
+        student = Student.objects.get(pk=student_id)
+        CertificateService.create_certificate_for_student(student)
+        return student_id, None
+    except Exception as e:
+        return student_id, f"{type(e).__name__}: {e}"
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from datetime import timedelta
+import uuid
+
+from certificates.models import Certificate
+from students.models import Student
+
+User = get_user_model()
+
+# Share of seeded students per status, pending is the small review queue
+SEED_STATUSES = [('accepted', 0.75), ('rejected', 0.2), ('pending', 0.05)]
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot list/login queries and check that they use their indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=20000,
+                            help='Students to insert before checking (rolled back afterwards, 0 uses existing data)')
+
+    def get_checks(self):
+        """(description, queryset, index names any of which the plan should use)"""
+        return [
+            ('pending applications, newest first',
+             Student.objects.filter(approve_status='pending').order_by('-created_at', '-pk')[:50],
+             ['student_pending_created_idx', 'student_status_created_idx']),
+            ('accepted applications, newest first',
+             Student.objects.filter(approve_status='accepted').order_by('-created_at', '-pk')[:50],
+             ['student_status_created_idx']),
+            ('all applications, newest first',
+             Student.objects.order_by('-created_at', '-pk')[:50],
+             ['student_created_idx']),
+            ('certificates, newest first',
+             Certificate.objects.order_by('-issued_date', '-pk')[:50],
+             ['certificate_issued_idx']),
+            ('user login by email',
+             User.objects.filter(email='seed-user-1@example.com'),
+             ['auth_user_email_idx']),
+        ]
+
+    def seed(self, count):
+        now = timezone.now()
+        students = []
+        position = 0
+        for status, share in SEED_STATUSES:
+            for _ in range(int(count * share)):
+                position += 1
+                students.append(Student(
+                    full_name=f'Seed Student {position}',
+                    fathers_name='Seed Father',
+                    address='Seed Address',
+                    enrolled_date=now.date(),
+                    course_name='web_development',
+                    course_duration='3 months',
+                    mode_of_learning='online',
+                    instructor_name='Seed Instructor',
+                    student_photo='seed/photo.jpg',
+                    email_address=f'seed-{position}@example.com',
+                    approve_status=status,
+                ))
+        students = Student.objects.bulk_create(students, batch_size=1000)
+
+        Certificate.objects.bulk_create([
+            Certificate(
+                student=student,
+                certificate_number=f'CERT-SEED-{student.pk}',
+                verification_code=uuid.uuid4().hex,
+                issued_date=(now - timedelta(days=student.pk % 730)).date(),
+            )
+            for student in students if student.approve_status == 'accepted'
+        ], batch_size=1000)
+
+        User.objects.bulk_create([
+            User(username=f'seed-user-{i}', email=f'seed-user-{i}@example.com')
+            for i in range(max(count // 10, 1))
+        ], batch_size=1000)
+
+        with connection.cursor() as cursor:
+            for model in [Student, Certificate, User]:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+    def handle(self, *args, **options):
+        failures = []
+
+        # Everything, including the seeded rows, is rolled back at the end
+        with transaction.atomic():
+            if options['seed']:
+                self.stdout.write(f"Seeding {options['seed']} students...")
+                self.seed(options['seed'])
+
+            for description, queryset, index_names in self.get_checks():
+                plan = queryset.explain()
+                used = [name for name in index_names if name in plan]
+                if used:
+                    self.stdout.write(self.style.SUCCESS(f'OK    {description}: uses {used[0]}'))
+                else:
+                    failures.append(description)
+                    self.stdout.write(self.style.ERROR(f'FAIL  {description}: expected {" or ".join(index_names)}'))
+                self.stdout.write(f'      {plan.replace(chr(10), chr(10) + "      ")}')
+
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f'{len(failures)} query plan(s) do not use their index: {", ".join(failures)}')
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from datetime import timedelta
+
+from core.media_gc import GC_BATCH_SIZE, MEDIA_DIRECTORIES, collect_orphaned_media
+
+
+class Command(BaseCommand):
+    help = 'Delete media files (photos, certificates, QR codes) that no student or certificate references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directories', nargs='*', default=MEDIA_DIRECTORIES,
+                            help=f"Media directories to scan (default: {', '.join(MEDIA_DIRECTORIES)})")
+        parser.add_argument('--dry-run', action='store_true',
+                            help='List orphaned files without deleting them')
+        parser.add_argument('--min-age-hours', type=float, default=24,
+                            help='Only delete files last modified at least this many hours ago')
+        parser.add_argument('--batch-size', type=int, default=GC_BATCH_SIZE,
+                            help='Orphans re-checked against the database and deleted together')
+
+    def handle(self, *args, **options):
+        unknown = sorted(set(options['directories']) - set(MEDIA_DIRECTORIES))
+        if unknown:
+            raise CommandError(f"Not a media directory: {', '.join(unknown)}")
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        dry_run = options['dry_run']
+        verbose = options['verbosity'] >= 2
+
+        def report(name, size):
+            if verbose or dry_run:
+                self.stdout.write(f"{'would delete' if dry_run else 'deleted'} {name} ({size} bytes)")
+
+        stats = collect_orphaned_media(
+            min_age=timedelta(hours=options['min_age_hours']),
+            batch_size=options['batch_size'],
+            dry_run=dry_run,
+            directories=options['directories'],
+            report=report,
+        )
+
+        action = 'would be deleted' if dry_run else 'deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['orphaned']} orphaned files, {stats['deleted']} {action} "
+            f"({stats['bytes'] / 1024 / 1024:.1f} MB), {stats['kept']} kept (too new or referenced again)"
+        ))
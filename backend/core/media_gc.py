@@ -0,0 +1,151 @@
+"""
+Garbage collection of media files that no row references any more.
+
+Files are left behind by replaced photos and regenerated certificates (the
+content storage never deletes shared files in place), by certificates deleted
+after a failed PDF build and by cascaded student deletions.
+
+The scan is a merge of two sorted streams: the referenced names, read from the
+database with iterator() in binary order, and a walk of the storage that lists
+one directory at a time in the same order. Neither side is held in memory, so
+the scan stays bounded however large the media tree grows. Orphans are deleted
+in batches, and each batch is checked against the database again first,
+because an identical upload can start referencing an orphaned file at any time.
+"""
+from django.db import connection
+from django.db.models.functions import Collate
+from django.utils import timezone
+from datetime import timedelta
+import heapq
+import posixpath
+
+from certificates.models import Certificate
+from students.models import Student
+
+from .storage import content_storage
+
+# (model, file field) pairs whose names are kept
+MEDIA_FIELDS = [
+    (Student, 'student_photo'),
+    (Student, 'certificate_photo'),
+    (Certificate, 'certificate_file'),
+    (Certificate, 'qr_code'),
+]
+
+# Top-level media directories written by the fields above; nothing else is scanned
+MEDIA_DIRECTORIES = ['certificate_photos', 'certificates', 'qr_codes', 'student_photos']
+
+# Collation that orders text like Python compares str (by code point)
+BINARY_COLLATIONS = {'postgresql': 'C', 'sqlite': 'BINARY'}
+
+GC_BATCH_SIZE = 500
+GC_CHUNK_SIZE = 5000
+GC_MIN_AGE = timedelta(hours=24)
+
+
+def iter_referenced_names(chunk_size=GC_CHUNK_SIZE):
+    """Every file name stored in MEDIA_FIELDS, in ascending binary order (may repeat)"""
+    collation = BINARY_COLLATIONS.get(connection.vendor)
+    streams = []
+    for model, field in MEDIA_FIELDS:
+        ordering = Collate(field, collation) if collation else field
+        queryset = (
+            model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+            .order_by(ordering).values_list(field, flat=True)
+        )
+        streams.append(queryset.iterator(chunk_size=chunk_size))
+    return heapq.merge(*streams)
+
+
+def iter_storage_names(storage, directories=MEDIA_DIRECTORIES):
+    """
+    Every file name under the given directories, in ascending binary order.
+
+    Directories sort as 'name/' so that a walk yields exactly the order the
+    full names compare in (e.g. 'a.b' before 'a/x').
+    """
+    entries = sorted((f'{directory.strip("/")}/', True) for directory in directories)
+    yield from _walk(storage, '', entries)
+
+
+def _walk(storage, directory, entries):
+    for entry, is_dir in entries:
+        name = posixpath.join(directory, entry.rstrip('/'))
+        if not is_dir:
+            yield name
+            continue
+        if not storage.exists(name):
+            continue
+        dirs, files = storage.listdir(name)
+        children = sorted([(f'{d}/', True) for d in dirs] + [(f, False) for f in files])
+        yield from _walk(storage, name, children)
+
+
+def iter_orphaned_names(storage, directories=MEDIA_DIRECTORIES, chunk_size=GC_CHUNK_SIZE):
+    """Stored names that no row references (merge of the two sorted streams)"""
+    referenced = iter_referenced_names(chunk_size)
+    current = next(referenced, None)
+    for name in iter_storage_names(storage, directories):
+        while current is not None and current < name:
+            current = next(referenced, None)
+        if current != name:
+            yield name
+
+
+def find_referenced(names):
+    """Subset of names that some row references, checked directly against the database"""
+    referenced = set()
+    for model, field in MEDIA_FIELDS:
+        referenced.update(
+            model.objects.filter(**{f'{field}__in': names}).values_list(field, flat=True)
+        )
+    return referenced
+
+
+def collect_orphaned_media(min_age=GC_MIN_AGE, batch_size=GC_BATCH_SIZE, dry_run=False,
+                           directories=MEDIA_DIRECTORIES, storage=None, report=None):
+    """
+    Delete media files that no row references and that are older than min_age.
+
+    Args:
+        min_age: Files modified more recently are kept (uploads whose row is not committed yet)
+        batch_size: Orphans re-checked and deleted together
+        dry_run: Only count what would be deleted
+        directories: Top-level media directories to scan
+        storage: Storage to clean (defaults to the content storage)
+        report: Optional callback report(name, size) for every orphan found
+
+    Returns:
+        dict: orphaned (found), deleted, kept (too new or referenced again) and bytes freed
+    """
+    storage = storage or content_storage()
+    cutoff = timezone.now() - min_age
+    stats = {'orphaned': 0, 'deleted': 0, 'kept': 0, 'bytes': 0}
+
+    def flush(batch):
+        referenced = find_referenced([name for name, _ in batch])
+        for name, size in batch:
+            if name in referenced:
+                stats['kept'] += 1
+                continue
+            if not dry_run:
+                storage.delete(name)
+            stats['deleted'] += 1
+            stats['bytes'] += size
+            if report:
+                report(name, size)
+
+    batch = []
+    for name in iter_orphaned_names(storage, directories):
+        stats['orphaned'] += 1
+        if storage.get_modified_time(name) > cutoff:
+            stats['kept'] += 1
+            continue
+        batch.append((name, storage.size(name)))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    return stats
@@ -0,0 +1,120 @@
+"""
+Keyset (cursor) pagination for the admin list pages.
+
+Pages are selected with a WHERE on the sort key and the primary key instead of
+OFFSET, so every page costs the same no matter how deep it is, and only the
+visible rows (plus one to detect another page) are fetched.
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+import base64
+import binascii
+import json
+
+# Offered in the "Per page" filter
+PAGE_SIZE_CHOICES = [25, 50, 100, 200]
+
+
+def get_page_size(request):
+    """Page size from ?page_size=, clamped to settings.PAGINATION_MAX_PAGE_SIZE"""
+    try:
+        page_size = int(request.GET.get('page_size', settings.PAGINATION_PAGE_SIZE))
+    except ValueError:
+        page_size = settings.PAGINATION_PAGE_SIZE
+    return max(1, min(page_size, settings.PAGINATION_MAX_PAGE_SIZE))
+
+
+class KeysetPage:
+    def __init__(self, object_list, page_size, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset newest first on (key, pk).
+
+    Args:
+        queryset: Rows to paginate (filters already applied)
+        key: Name of the sort field, e.g. 'created_at' or 'issued_date'
+        page_size: Rows per page
+    """
+
+    def __init__(self, queryset, key, page_size):
+        self.queryset = queryset
+        self.key = key
+        self.page_size = page_size
+        self.key_field = queryset.model._meta.get_field(key)
+
+    def encode_cursor(self, obj):
+        value = self.key_field.value_to_string(obj)
+        return base64.urlsafe_b64encode(json.dumps([value, obj.pk]).encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        """Return (key value, pk) from a cursor, or None if it is not valid"""
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return self.key_field.to_python(value), int(pk)
+        except (ValueError, TypeError, binascii.Error, ValidationError):
+            return None
+
+    def get_page(self, after=None, before=None):
+        """
+        Return the page after (older than) or before (newer than) a cursor.
+
+        Without a valid cursor the first (newest) page is returned.
+        """
+        position = self.decode_cursor(after) if after else None
+        backwards = False
+        if position is None and before:
+            position = self.decode_cursor(before)
+            backwards = position is not None
+
+        queryset = self.queryset
+        if position is None:
+            queryset = queryset.order_by(f'-{self.key}', '-pk')
+        elif backwards:
+            value, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{self.key}__gt': value}) | Q(**{self.key: value, 'pk__gt': pk})
+            ).order_by(self.key, 'pk')
+        else:
+            value, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{self.key}__lt': value}) | Q(**{self.key: value, 'pk__lt': pk})
+            ).order_by(f'-{self.key}', '-pk')
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+
+        return KeysetPage(
+            rows,
+            self.page_size,
+            next_cursor=self.encode_cursor(rows[-1]) if rows and has_next else None,
+            previous_cursor=self.encode_cursor(rows[0]) if rows and has_previous else None,
+        )
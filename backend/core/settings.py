@@ -47,6 +47,7 @@ BUILTIN_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 EXTERNAL_APPS = [
@@ -61,6 +62,7 @@ LOCAL_APPS = [
     'admin_panel',
     'home',
     'certificates',
+    'jobs',
 ]
 
 INSTALLED_APPS = BUILTIN_APPS + EXTERNAL_APPS + LOCAL_APPS
@@ -116,6 +118,18 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/ref/settings/#caches
+# Must be shared by every process (web workers, run_jobs, dispatch_emails, management
+# commands): cached certificate snapshots, status counts and throttles are invalidated
+# from any of them, and public verification is served from it instead of the database.
+# Required, there is no default: e.g. DJANGO_CACHE_URL=redis://redis:6379/1 (needs the
+# redis package) or pymemcache://memcached:11211.
+# A process-local backend (locmemcache://) is only safe with a single process.
+CACHES = {
+    'default': env.cache('DJANGO_CACHE_URL'),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -160,6 +174,25 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    # Student photos and certificate files, content-addressed and deduplicated (see core.storage)
+    'content': {
+        'BACKEND': 'core.storage.ContentAddressedFileSystemStorage',
+    },
+}
+
+REST_FRAMEWORK = {
+    'DEFAULT_THROTTLE_RATES': {
+        'certificate_verification': env.str('CERTIFICATE_VERIFICATION_RATE', default='60/minute'),
+    },
+}
+
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
@@ -178,6 +211,24 @@ LOGOUT_REDIRECT_URL = '/admin-panel/login/'
 SITE_URL = env.str('SITE_URL', default='http://localhost:8000')
 
 
+# Admin list pages (core.pagination), overridable per request with ?page_size=
+PAGINATION_PAGE_SIZE = env.int('PAGINATION_PAGE_SIZE', default=50)
+PAGINATION_MAX_PAGE_SIZE = env.int('PAGINATION_MAX_PAGE_SIZE', default=200)
+
+
+# Certificate downloads
+# '' streams the file from Django, 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache/lighttpd)
+# hand the file over to the front proxy after the request has been authorised
+CERTIFICATE_DOWNLOAD_OFFLOAD = env.str('CERTIFICATE_DOWNLOAD_OFFLOAD', default='')
+# Internal nginx location that maps to MEDIA_ROOT, used with x-accel-redirect
+CERTIFICATE_DOWNLOAD_ACCEL_PREFIX = env.str('CERTIFICATE_DOWNLOAD_ACCEL_PREFIX', default='/protected-media/')
+
+# How acceptance emails deliver the certificate when the student has no preference:
+# 'link' sends a signed, expiring download link, 'attachment' attaches the PDF and QR code
+CERTIFICATE_EMAIL_DELIVERY = env.str('CERTIFICATE_EMAIL_DELIVERY', default='link')
+CERTIFICATE_LINK_MAX_AGE_DAYS = env.int('CERTIFICATE_LINK_MAX_AGE_DAYS', default=30)
+
+
 # Email configuration
 EMAIL_BACKEND = env.str('DJANGO_EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = env.str('DJANGO_EMAIL_HOST', default='')
@@ -188,6 +239,9 @@ EMAIL_HOST_PASSWORD = env.str('DJANGO_EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = env.str('DJANGO_DEFAULT_FROM_EMAIL', default='noreply@studentportal.com')
 
 EMAIL_TIMEOUT = 30  # seconds
+# Pooled notification connection (students.mailer): reopen after this many idle seconds or messages
+EMAIL_POOL_MAX_IDLE = env.int('DJANGO_EMAIL_POOL_MAX_IDLE', default=240)
+EMAIL_POOL_MAX_MESSAGES = env.int('DJANGO_EMAIL_POOL_MAX_MESSAGES', default=100)
 EMAIL_SSL_KEYFILE = None
 EMAIL_SSL_CERTFILE = None
 
@@ -0,0 +1,77 @@
+"""
+Content-addressed media storage.
+
+Files are stored under <upload_to directory>/<aa>/<bb>/<sha256><ext>, where aa and
+bb are the first characters of the content hash. Identical uploads map to the
+same name and are written once, and the two shard levels keep every directory
+small no matter how many files there are. Files may be shared between rows, so
+replaced files are never deleted in place; the gc_media command removes files
+that nothing references any more.
+"""
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+import hashlib
+import os
+import posixpath
+
+
+class ContentAddressedStorageMixin:
+    """Names files after the hash of their content, for any Storage backend"""
+    hash_algorithm = 'sha256'
+    shard_depth = 2
+    shard_width = 2
+
+    def get_content_hash(self, content):
+        hasher = hashlib.new(self.hash_algorithm)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            hasher.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        return hasher.hexdigest()
+
+    def get_hashed_name(self, name, digest):
+        """Keep the directory and extension of name, replace the file name with the sharded digest"""
+        directory, basename = posixpath.split(name.replace('\\', '/'))
+        ext = posixpath.splitext(basename)[1].lower()
+        shards = [digest[i * self.shard_width:(i + 1) * self.shard_width] for i in range(self.shard_depth)]
+        return posixpath.join(directory, *shards, f'{digest}{ext}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        name = self.get_hashed_name(name, self.get_content_hash(content))
+        if self.exists(name):
+            # Same content is already stored. Mark it as just written, so gc_media's
+            # min-age guard keeps it until the row that will reference it is committed
+            try:
+                self.touch(name)
+                return name
+            except FileNotFoundError:
+                # Deleted by gc_media in the meantime, write it again
+                pass
+        return super().save(name, content, max_length=max_length)
+
+    def touch(self, name):
+        """Set the modified time of a stored file to now (backends that cannot do it leave it alone)"""
+
+
+class ContentAddressedFileSystemStorage(ContentAddressedStorageMixin, FileSystemStorage):
+    """Content-addressed storage on a local directory (MEDIA_ROOT unless location is given)"""
+
+    def __init__(self, **kwargs):
+        # Two writers of the same name always write the same bytes, so overwriting is safe
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(**kwargs)
+
+    def touch(self, name):
+        os.utime(self.path(name))
+
+
+def content_storage():
+    """Storage for student photos and certificate files (settings.STORAGES['content'])"""
+    return storages['content']
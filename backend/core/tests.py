@@ -0,0 +1,162 @@
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from django.utils import timezone
+from datetime import date, timedelta
+from unittest import mock
+import os
+import shutil
+import tempfile
+
+from students.models import Student
+
+from . import media_gc
+from .media_gc import collect_orphaned_media, iter_referenced_names, iter_storage_names
+from .storage import ContentAddressedFileSystemStorage
+
+# Names whose binary order differs from a naive per-directory listing
+TRICKY_NAMES = [
+    'student_photos/A.jpg',
+    'student_photos/a-b.jpg',
+    'student_photos/a.b',
+    'student_photos/a/x.jpg',
+    'student_photos/a0.jpg',
+    'student_photos/a_b.jpg',
+    'student_photos/b.jpg',
+]
+
+
+class MediaGCTestCase(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = ContentAddressedFileSystemStorage(location=self.location)
+
+    def write(self, name, age=timedelta(days=2)):
+        """Create a media file last modified age ago"""
+        path = self.storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'content')
+        mtime = (timezone.now() - age).timestamp()
+        os.utime(path, (mtime, mtime))
+
+    def create_student(self, student_photo, certificate_photo=None):
+        return Student.objects.create(
+            full_name='Test Student',
+            fathers_name='Test Father',
+            address='Kathmandu',
+            enrolled_date=date(2025, 1, 1),
+            course_name='web_development',
+            course_duration='3 months',
+            mode_of_learning='online',
+            instructor_name='Instructor',
+            email_address='student@example.com',
+            student_photo=student_photo,
+            certificate_photo=certificate_photo or student_photo.replace('student_photos/', 'certificate_photos/'),
+        )
+
+    def collect(self, **kwargs):
+        return collect_orphaned_media(storage=self.storage, **kwargs)
+
+
+class StorageOrderTests(MediaGCTestCase):
+    def test_walk_yields_binary_order(self):
+        for name in reversed(TRICKY_NAMES):
+            self.write(name)
+        self.write('certificates/a.pdf')
+        self.write('certificate_photos/a.jpg')
+
+        names = list(iter_storage_names(self.storage))
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(names, ['certificate_photos/a.jpg', 'certificates/a.pdf'] + TRICKY_NAMES)
+
+    def test_walk_skips_missing_directories(self):
+        self.write('student_photos/a.jpg')
+        self.assertEqual(list(iter_storage_names(self.storage)), ['student_photos/a.jpg'])
+
+    def test_referenced_names_in_binary_order(self):
+        for name in reversed(TRICKY_NAMES):
+            self.create_student(name)
+
+        names = list(iter_referenced_names(chunk_size=2))
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(names), 2 * len(TRICKY_NAMES))
+
+    def test_referenced_tricky_names_are_not_orphans(self):
+        for name in TRICKY_NAMES:
+            self.write(name)
+            self.create_student(name)
+
+        stats = self.collect()
+        self.assertEqual(stats['orphaned'], 0)
+        for name in TRICKY_NAMES:
+            self.assertTrue(self.storage.exists(name))
+
+
+class CollectOrphanedMediaTests(MediaGCTestCase):
+    def test_deletes_old_orphans_only(self):
+        self.write('student_photos/kept.jpg')
+        self.create_student('student_photos/kept.jpg')
+        self.write('student_photos/old.jpg')
+        self.write('qr_codes/old.png')
+
+        stats = self.collect()
+        self.assertEqual(stats, {'orphaned': 2, 'deleted': 2, 'kept': 0, 'bytes': 14})
+        self.assertTrue(self.storage.exists('student_photos/kept.jpg'))
+        self.assertFalse(self.storage.exists('student_photos/old.jpg'))
+        self.assertFalse(self.storage.exists('qr_codes/old.png'))
+
+    def test_min_age_keeps_recent_files(self):
+        self.write('student_photos/new.jpg', age=timedelta(hours=1))
+        self.write('student_photos/old.jpg', age=timedelta(hours=25))
+
+        stats = self.collect(min_age=timedelta(hours=24))
+        self.assertEqual(stats['orphaned'], 2)
+        self.assertEqual(stats['deleted'], 1)
+        self.assertEqual(stats['kept'], 1)
+        self.assertTrue(self.storage.exists('student_photos/new.jpg'))
+        self.assertFalse(self.storage.exists('student_photos/old.jpg'))
+
+    def test_dry_run_deletes_nothing(self):
+        self.write('student_photos/old.jpg')
+        reported = []
+
+        stats = self.collect(dry_run=True, report=lambda name, size: reported.append(name))
+        self.assertEqual(stats['deleted'], 1)
+        self.assertEqual(reported, ['student_photos/old.jpg'])
+        self.assertTrue(self.storage.exists('student_photos/old.jpg'))
+
+    def test_batch_rechecks_names_referenced_during_scan(self):
+        names = ['student_photos/a.jpg', 'student_photos/b.jpg', 'student_photos/c.jpg']
+        for name in names:
+            self.write(name)
+        iter_orphaned_names = media_gc.iter_orphaned_names
+
+        def referenced_after_scan(*args, **kwargs):
+            # An identical upload starts using b.jpg after the stream listed it as orphaned
+            for name in iter_orphaned_names(*args, **kwargs):
+                yield name
+                if name == 'student_photos/b.jpg':
+                    self.create_student(name)
+
+        with mock.patch.object(media_gc, 'iter_orphaned_names', referenced_after_scan):
+            stats = self.collect(batch_size=3)
+
+        self.assertEqual(stats['orphaned'], 3)
+        self.assertEqual(stats['deleted'], 2)
+        self.assertEqual(stats['kept'], 1)
+        self.assertTrue(self.storage.exists('student_photos/b.jpg'))
+        self.assertFalse(self.storage.exists('student_photos/a.jpg'))
+        self.assertFalse(self.storage.exists('student_photos/c.jpg'))
+
+    def test_deduplicated_save_refreshes_min_age(self):
+        name = self.storage.save('student_photos/photo.jpg', ContentFile(b'content'))
+        self.write(name)
+
+        # The same photo uploaded again, its row is not committed yet
+        self.assertEqual(self.storage.save('student_photos/photo.jpg', ContentFile(b'content')), name)
+
+        stats = self.collect()
+        self.assertEqual(stats['deleted'], 0)
+        self.assertEqual(stats['kept'], 1)
+        self.assertTrue(self.storage.exists(name))
@@ -1,11 +1,12 @@
 from django.shortcuts import render
 from students.models import Student
+from students.stats import get_status_counts
 
 
 def home(request):
     """Home page view"""
     # Get some statistics for the home page
-    total_students = Student.objects.count() or 0
+    total_students = get_status_counts()['total']
     recent_students = Student.objects.order_by('-created_at')[:5] or []
 
     context = {
@@ -0,0 +1,17 @@
+from django.contrib import admin
+from .models import Job, OutboxEmail
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'status', 'attempts', 'max_attempts', 'run_after', 'created_at']
+    list_filter = ['status', 'task']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['subject', 'to']
+    readonly_fields = ['created_at', 'updated_at', 'sent_at']
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from jobs.outbox import OutboxService
+import time
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbox emails in batches over a reused mail connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Number of emails claimed per batch')
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help='Seconds to wait when the outbox is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Send everything that is due and exit instead of polling')
+        parser.add_argument('--stats', action='store_true',
+                            help='Print outbox statistics and exit')
+
+    def write_stats(self):
+        stats = OutboxService.stats()
+        self.stdout.write(
+            f"outbox: {stats['pending']} pending, {stats['sending']} sending, {stats['sent']} sent, "
+            f"{stats['dead']} dead, lag {stats['lag_seconds']:.1f}s"
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.write_stats()
+            return
+
+        while True:
+            result = OutboxService.drain(options['batch_size'])
+            if result['sent'] or result['failed']:
+                self.stdout.write(
+                    f"{result['sent']} sent, {result['failed']} failed "
+                    f"({result['throughput']:.1f} emails/s)"
+                )
+                self.write_stats()
+
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
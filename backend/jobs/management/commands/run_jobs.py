@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from jobs.services import JobService
+import time
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (certificate issuance, notification emails)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10,
+                            help='Number of jobs claimed per batch')
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Run all due jobs and exit instead of polling')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        while True:
+            succeeded, failed = JobService.run_pending(batch_size)
+            if succeeded or failed:
+                self.stdout.write(f'{succeeded} jobs done, {failed} failed')
+                continue
+
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
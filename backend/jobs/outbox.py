@@ -0,0 +1,192 @@
+"""
+Transactional email outbox.
+
+Emails are written to the OutboxEmail table in the same transaction as the change
+that triggers them and sent later by the dispatch_emails command, in batches over
+the pooled mail connection (students.mailer). Failed sends are retried with
+exponential backoff; after max_attempts the email is dead-lettered (status "dead").
+"""
+from datetime import timedelta
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+import base64
+import time
+
+from core.storage import content_storage
+
+from .models import OutboxEmail
+
+# Retry delay is RETRY_BASE_DELAY * 2 ** (attempts - 1), capped at RETRY_MAX_DELAY
+RETRY_BASE_DELAY = timedelta(seconds=30)
+RETRY_MAX_DELAY = timedelta(hours=2)
+
+# An email left in "sending" by a dispatcher that died is picked up again after this long
+STALE_SENDING_TIMEOUT = timedelta(minutes=10)
+
+
+class OutboxService:
+    @staticmethod
+    def make_outbox_email(message, file_attachments=()):
+        """
+        Build an unsaved OutboxEmail for an EmailMessage.
+
+        Args:
+            message: EmailMessage or EmailMultiAlternatives to send
+            file_attachments: (filename, storage_name, mimetype) of files in the content storage
+                (certificates, photos) to attach at send time, so large files are not copied into the table
+        """
+        attachments = [
+            {'filename': filename, 'storage_name': storage_name, 'mimetype': mimetype}
+            for filename, storage_name, mimetype in file_attachments
+        ]
+        for filename, content, mimetype in message.attachments:
+            if isinstance(content, str):
+                content = content.encode('utf-8')
+            attachments.append({
+                'filename': filename,
+                'mimetype': mimetype,
+                'content': base64.b64encode(content).decode('ascii'),
+            })
+
+        return OutboxEmail(
+            subject=message.subject,
+            body=message.body,
+            content_subtype=message.content_subtype,
+            alternatives=[[content, mimetype] for content, mimetype in getattr(message, 'alternatives', [])],
+            from_email=message.from_email,
+            to=list(message.to),
+            attachments=attachments,
+        )
+
+    @staticmethod
+    def queue_email(message, file_attachments=()):
+        """Store an EmailMessage in the outbox (see make_outbox_email)"""
+        outbox_email = OutboxService.make_outbox_email(message, file_attachments)
+        outbox_email.save()
+        return outbox_email
+
+    @staticmethod
+    def queue_emails(messages):
+        """Store many EmailMessages (without file attachments) in the outbox with one bulk insert"""
+        return OutboxEmail.objects.bulk_create(
+            [OutboxService.make_outbox_email(message) for message in messages],
+            batch_size=500,
+        )
+
+    @staticmethod
+    def build_message(outbox_email):
+        """Rebuild the EmailMultiAlternatives for an outbox row"""
+        message = EmailMultiAlternatives(
+            subject=outbox_email.subject,
+            body=outbox_email.body,
+            from_email=outbox_email.from_email,
+            to=outbox_email.to,
+        )
+        message.content_subtype = outbox_email.content_subtype
+        for content, mimetype in outbox_email.alternatives:
+            message.attach_alternative(content, mimetype)
+
+        for attachment in outbox_email.attachments:
+            if 'storage_name' in attachment:
+                with content_storage().open(attachment['storage_name'], 'rb') as f:
+                    content = f.read()
+            else:
+                content = base64.b64decode(attachment['content'])
+            message.attach(attachment['filename'], content, attachment['mimetype'])
+
+        return message
+
+    @staticmethod
+    def claim_batch(batch_size=50):
+        """Mark up to batch_size due emails as sending and return them"""
+        now = timezone.now()
+
+        with transaction.atomic():
+            due = OutboxEmail.objects.filter(
+                Q(status='pending', next_attempt_at__lte=now)
+                | Q(status='sending', updated_at__lte=now - STALE_SENDING_TIMEOUT)
+            )
+            emails = list(due.select_for_update(skip_locked=True).order_by('next_attempt_at', 'id')[:batch_size])
+            for outbox_email in emails:
+                outbox_email.status = 'sending'
+                outbox_email.attempts += 1
+                outbox_email.updated_at = now  # bulk_update does not apply auto_now
+            OutboxEmail.objects.bulk_update(emails, ['status', 'attempts', 'updated_at'])
+
+        return emails
+
+    @staticmethod
+    def dispatch_batch(batch_size=50):
+        """
+        Send one batch of due emails over the pooled connection.
+
+        Returns:
+            (sent, failed) counts for the batch
+        """
+        from students.mailer import mail_pool
+
+        sent = failed = 0
+        for outbox_email in OutboxService.claim_batch(batch_size):
+            try:
+                mail_pool.send(OutboxService.build_message(outbox_email))
+            except Exception as e:
+                failed += 1
+                outbox_email.last_error = f"{type(e).__name__}: {e}"
+                if outbox_email.attempts >= outbox_email.max_attempts:
+                    outbox_email.status = 'dead'
+                else:
+                    delay = min(RETRY_BASE_DELAY * 2 ** (outbox_email.attempts - 1), RETRY_MAX_DELAY)
+                    outbox_email.status = 'pending'
+                    outbox_email.next_attempt_at = timezone.now() + delay
+                outbox_email.save(update_fields=['status', 'next_attempt_at', 'last_error', 'updated_at'])
+                continue
+
+            sent += 1
+            outbox_email.status = 'sent'
+            outbox_email.sent_at = timezone.now()
+            outbox_email.save(update_fields=['status', 'sent_at', 'updated_at'])
+
+        return sent, failed
+
+    @staticmethod
+    def drain(batch_size=50):
+        """
+        Dispatch batches until nothing is due.
+
+        Returns:
+            dict: sent and failed counts, elapsed seconds and throughput (sent per second)
+        """
+        started = time.monotonic()
+        total_sent = total_failed = 0
+
+        while True:
+            sent, failed = OutboxService.dispatch_batch(batch_size)
+            total_sent += sent
+            total_failed += failed
+            if not sent and not failed:
+                break
+
+        elapsed = time.monotonic() - started
+        return {
+            'sent': total_sent,
+            'failed': total_failed,
+            'elapsed_seconds': elapsed,
+            'throughput': total_sent / elapsed if elapsed else 0.0,
+        }
+
+    @staticmethod
+    def stats():
+        """Outbox counts per status and the lag (age in seconds) of the oldest unsent email"""
+        counts = dict(OutboxEmail.objects.values_list('status').annotate(count=Count('id')))
+        oldest = OutboxEmail.objects.filter(status__in=['pending', 'sending']).aggregate(
+            oldest=Min('created_at'))['oldest']
+
+        return {
+            'pending': counts.get('pending', 0),
+            'sending': counts.get('sending', 0),
+            'sent': counts.get('sent', 0),
+            'dead': counts.get('dead', 0),
+            'lag_seconds': (timezone.now() - oldest).total_seconds() if oldest else 0.0,
+        }
@@ -0,0 +1,123 @@
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+import threading
+import traceback
+
+from .models import Job
+
+# Retry delay is RETRY_BASE_DELAY * 2 ** (attempts - 1), capped at RETRY_MAX_DELAY
+RETRY_BASE_DELAY = timedelta(seconds=30)
+RETRY_MAX_DELAY = timedelta(hours=1)
+
+# A running job whose worker died is picked up again after this long
+STALE_JOB_TIMEOUT = timedelta(minutes=15)
+
+# While a worker holds claimed jobs it touches their updated_at this often, so a job
+# that runs (or waits in the batch) longer than STALE_JOB_TIMEOUT is not reclaimed
+JOB_HEARTBEAT_INTERVAL = timedelta(minutes=1)
+
+
+class JobHeartbeat:
+    """Keep the updated_at of claimed jobs fresh from a background thread while they run"""
+
+    def __init__(self, job_ids, interval=JOB_HEARTBEAT_INTERVAL):
+        self.job_ids = list(job_ids)
+        self.interval = interval.total_seconds()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='job-heartbeat', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    # Finished and rescheduled jobs are no longer 'running' and are left alone
+                    Job.objects.filter(pk__in=self.job_ids, status='running').update(updated_at=timezone.now())
+                except Exception as e:
+                    print(f"Error updating job heartbeat: {e}")
+        finally:
+            # The thread has its own database connection
+            connection.close()
+
+
+class JobService:
+    @staticmethod
+    def enqueue(task, max_attempts=5, **payload):
+        """
+        Queue a task to be run by the run_jobs worker.
+
+        The job row is written in the caller's transaction, so it is only visible
+        to workers once the surrounding change has been committed.
+
+        Args:
+            task: Dotted path to the task function
+            max_attempts: How many times the task is tried before it is marked failed
+            **payload: JSON-serialisable keyword arguments passed to the task
+        """
+        return Job.objects.create(task=task, payload=payload, max_attempts=max_attempts)
+
+    @staticmethod
+    def claim_jobs(batch_size=10):
+        """Mark up to batch_size due jobs as running and return them."""
+        now = timezone.now()
+
+        with transaction.atomic():
+            due = Job.objects.filter(
+                Q(status='pending', run_after__lte=now)
+                | Q(status='running', updated_at__lte=now - STALE_JOB_TIMEOUT)
+            )
+            jobs = list(due.select_for_update(skip_locked=True).order_by('run_after', 'id')[:batch_size])
+            for job in jobs:
+                job.status = 'running'
+                job.attempts += 1
+                job.updated_at = now  # bulk_update does not apply auto_now
+            Job.objects.bulk_update(jobs, ['status', 'attempts', 'updated_at'])
+
+        return jobs
+
+    @staticmethod
+    def run_job(job):
+        """Run a claimed job, scheduling a retry with exponential backoff if it raises."""
+        try:
+            task = import_string(job.task)
+            task(**job.payload)
+        except Exception as e:
+            job.last_error = f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+            if job.attempts >= job.max_attempts:
+                job.status = 'failed'
+            else:
+                delay = min(RETRY_BASE_DELAY * 2 ** (job.attempts - 1), RETRY_MAX_DELAY)
+                job.status = 'pending'
+                job.run_after = timezone.now() + delay
+            job.save(update_fields=['status', 'run_after', 'last_error', 'updated_at'])
+            return False
+
+        job.status = 'done'
+        job.save(update_fields=['status', 'updated_at'])
+        return True
+
+    @staticmethod
+    def run_pending(batch_size=10):
+        """Claim and run one batch of due jobs, returning (succeeded, failed) counts."""
+        succeeded = failed = 0
+        jobs = JobService.claim_jobs(batch_size)
+        if not jobs:
+            return succeeded, failed
+
+        with JobHeartbeat([job.pk for job in jobs]):
+            for job in jobs:
+                if JobService.run_job(job):
+                    succeeded += 1
+                else:
+                    failed += 1
+        return succeeded, failed
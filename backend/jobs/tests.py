@@ -0,0 +1,239 @@
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.mail import EmailMessage
+from django.db import connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.utils import timezone
+from datetime import timedelta
+from unittest import mock
+import shutil
+import tempfile
+import threading
+
+from core.storage import content_storage
+
+from .models import OutboxEmail
+from .outbox import RETRY_BASE_DELAY, RETRY_MAX_DELAY, STALE_SENDING_TIMEOUT, OutboxService
+
+
+def make_message(to='student@example.com', **kwargs):
+    return EmailMessage(subject='Subject', body='Body', from_email='office@example.com', to=[to], **kwargs)
+
+
+class OutboxTestCase(TestCase):
+    def queue(self, **fields):
+        outbox_email = OutboxService.queue_email(make_message())
+        if fields:
+            OutboxEmail.objects.filter(pk=outbox_email.pk).update(**fields)
+            outbox_email.refresh_from_db()
+        return outbox_email
+
+    def assertAround(self, value, expected, delta=timedelta(seconds=5)):
+        self.assertLessEqual(abs(value - expected), delta)
+
+
+class QueueEmailTests(OutboxTestCase):
+    def test_stores_message(self):
+        message = make_message()
+        message.content_subtype = 'html'
+        message.attach('qr.png', b'\x89PNG', 'image/png')
+
+        outbox_email = OutboxService.queue_email(message, [('certificate.pdf', 'certificates/a.pdf', 'application/pdf')])
+        outbox_email.refresh_from_db()
+
+        self.assertEqual(outbox_email.status, 'pending')
+        self.assertEqual(outbox_email.to, ['student@example.com'])
+        self.assertEqual(outbox_email.content_subtype, 'html')
+        self.assertEqual(outbox_email.attachments, [
+            {'filename': 'certificate.pdf', 'storage_name': 'certificates/a.pdf', 'mimetype': 'application/pdf'},
+            {'filename': 'qr.png', 'mimetype': 'image/png', 'content': 'iVBORw=='},
+        ])
+
+    def test_queue_emails_inserts_in_bulk(self):
+        with self.assertNumQueries(1):
+            OutboxService.queue_emails([make_message(f'student{i}@example.com') for i in range(3)])
+        self.assertEqual(OutboxEmail.objects.filter(status='pending').count(), 3)
+
+    def test_build_message_reads_stored_attachments(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        storages = {
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'content': {'BACKEND': 'core.storage.ContentAddressedFileSystemStorage', 'OPTIONS': {'location': location}},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        }
+        with override_settings(STORAGES=storages):
+            name = content_storage().save('certificates/certificate.pdf', ContentFile(b'%PDF'))
+            outbox_email = OutboxService.queue_email(make_message(), [('certificate.pdf', name, 'application/pdf')])
+
+            message = OutboxService.build_message(outbox_email)
+
+        self.assertEqual(message.attachments[0][:2], ('certificate.pdf', b'%PDF'))
+
+
+class ClaimBatchTests(OutboxTestCase):
+    def test_claims_due_emails(self):
+        due = self.queue()
+        self.queue(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        self.queue(status='sent')
+
+        claimed = OutboxService.claim_batch()
+
+        self.assertEqual([outbox_email.pk for outbox_email in claimed], [due.pk])
+        due.refresh_from_db()
+        self.assertEqual(due.status, 'sending')
+        self.assertEqual(due.attempts, 1)
+
+    def test_batch_size_and_order(self):
+        now = timezone.now()
+        later = self.queue(next_attempt_at=now - timedelta(minutes=1))
+        earlier = self.queue(next_attempt_at=now - timedelta(minutes=2))
+        self.queue(next_attempt_at=now)
+
+        claimed = OutboxService.claim_batch(batch_size=2)
+        self.assertEqual([outbox_email.pk for outbox_email in claimed], [earlier.pk, later.pk])
+
+    def test_reclaims_stale_sending_only(self):
+        stale = self.queue(status='sending', attempts=1)
+        fresh = self.queue(status='sending', attempts=1)
+        OutboxEmail.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - STALE_SENDING_TIMEOUT - timedelta(seconds=1))
+
+        claimed = OutboxService.claim_batch()
+        self.assertEqual([outbox_email.pk for outbox_email in claimed], [stale.pk])
+        self.assertEqual(claimed[0].attempts, 2)
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.attempts, 1)
+
+
+class ClaimBatchLockingTests(TransactionTestCase):
+    available_apps = ['jobs']
+
+    @skipUnlessDBFeature('has_select_for_update_skip_locked')
+    def test_skips_rows_locked_by_another_dispatcher(self):
+        locked = OutboxService.queue_email(make_message('locked@example.com'))
+        free = OutboxService.queue_email(make_message('free@example.com'))
+        holding = threading.Event()
+        release = threading.Event()
+
+        def hold_lock():
+            try:
+                with transaction.atomic():
+                    list(OutboxEmail.objects.select_for_update().filter(pk=locked.pk))
+                    holding.set()
+                    release.wait(10)
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=hold_lock)
+        thread.start()
+        try:
+            self.assertTrue(holding.wait(10))
+            claimed = OutboxService.claim_batch()
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual([outbox_email.pk for outbox_email in claimed], [free.pk])
+        locked.refresh_from_db()
+        self.assertEqual(locked.status, 'pending')
+
+
+@mock.patch('students.mailer.mail_pool.send')
+class DispatchBatchTests(OutboxTestCase):
+    def test_sends_and_marks_sent(self, send):
+        outbox_email = self.queue()
+
+        self.assertEqual(OutboxService.dispatch_batch(), (1, 0))
+
+        outbox_email.refresh_from_db()
+        self.assertEqual(outbox_email.status, 'sent')
+        self.assertIsNotNone(outbox_email.sent_at)
+        self.assertEqual(send.call_args.args[0].to, ['student@example.com'])
+
+    def test_failure_backs_off_exponentially(self, send):
+        send.side_effect = ConnectionError('smtp down')
+        outbox_email = self.queue()
+
+        for attempt in range(1, 4):
+            OutboxEmail.objects.filter(pk=outbox_email.pk).update(next_attempt_at=timezone.now())
+            self.assertEqual(OutboxService.dispatch_batch(), (0, 1))
+
+            outbox_email.refresh_from_db()
+            self.assertEqual(outbox_email.status, 'pending')
+            self.assertEqual(outbox_email.attempts, attempt)
+            self.assertEqual(outbox_email.last_error, 'ConnectionError: smtp down')
+            self.assertAround(outbox_email.next_attempt_at, timezone.now() + RETRY_BASE_DELAY * 2 ** (attempt - 1))
+
+    def test_backoff_is_capped(self, send):
+        send.side_effect = ConnectionError('smtp down')
+        outbox_email = self.queue(attempts=10, max_attempts=20)
+
+        OutboxService.dispatch_batch()
+
+        outbox_email.refresh_from_db()
+        self.assertAround(outbox_email.next_attempt_at, timezone.now() + RETRY_MAX_DELAY)
+
+    def test_dead_letters_after_max_attempts(self, send):
+        send.side_effect = ConnectionError('smtp down')
+        outbox_email = self.queue(attempts=7, max_attempts=8)
+
+        OutboxService.dispatch_batch()
+
+        outbox_email.refresh_from_db()
+        self.assertEqual(outbox_email.status, 'dead')
+        self.assertEqual(outbox_email.attempts, 8)
+        # Never claimed again
+        OutboxEmail.objects.filter(pk=outbox_email.pk).update(next_attempt_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(OutboxService.claim_batch(), [])
+
+    def test_one_failure_does_not_stop_the_batch(self, send):
+        send.side_effect = [ConnectionError('smtp down'), 1]
+        failing, sent = self.queue(), self.queue()
+
+        self.assertEqual(OutboxService.dispatch_batch(), (1, 1))
+        self.assertEqual(OutboxEmail.objects.get(pk=failing.pk).status, 'pending')
+        self.assertEqual(OutboxEmail.objects.get(pk=sent.pk).status, 'sent')
+
+    def test_drain_reports_throughput(self, send):
+        for _ in range(5):
+            self.queue()
+
+        result = OutboxService.drain(batch_size=2)
+
+        self.assertEqual(result['sent'], 5)
+        self.assertEqual(result['failed'], 0)
+        self.assertGreater(result['throughput'], 0)
+        self.assertFalse(OutboxEmail.objects.exclude(status='sent').exists())
+
+
+class DispatchThroughMailBackendTests(OutboxTestCase):
+    def test_message_reaches_backend(self):
+        message = make_message()
+        message.attach('qr.png', b'\x89PNG', 'image/png')
+        OutboxService.queue_email(message)
+
+        OutboxService.drain()
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['student@example.com'])
+        self.assertEqual(mail.outbox[0].attachments[0][:2], ('qr.png', b'\x89PNG'))
+
+
+class StatsTests(OutboxTestCase):
+    def test_counts_and_lag(self):
+        oldest = self.queue()
+        OutboxEmail.objects.filter(pk=oldest.pk).update(created_at=timezone.now() - timedelta(minutes=10))
+        self.queue(status='sending')
+        self.queue(status='sent')
+        self.queue(status='dead')
+
+        stats = OutboxService.stats()
+
+        self.assertEqual({key: stats[key] for key in ('pending', 'sending', 'sent', 'dead')},
+                         {'pending': 1, 'sending': 1, 'sent': 1, 'dead': 1})
+        self.assertAlmostEqual(stats['lag_seconds'], 600, delta=5)
+
+    def test_no_lag_when_empty(self):
+        self.queue(status='sent')
+        self.assertEqual(OutboxService.stats()['lag_seconds'], 0.0)
@@ -1,14 +1,19 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR
 from .models import Student
+from .search import search_students
 
 
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
     list_display = ['full_name', 'email_address', 'course_name', 'mode_of_learning', 'approve_status', 'created_at']
     list_filter = ['approve_status', 'course_name', 'mode_of_learning', 'created_at']
+    # The search itself is students.search (see get_search_results), the box only shows if search_fields is set
     search_fields = ['full_name', 'email_address', 'fathers_name']
+    search_help_text = 'Name, email, reference ID (STU000123) or certificate number'
     list_editable = ['approve_status']
     readonly_fields = ['created_at', 'updated_at']
+    actions = ['approve_selected', 'reject_selected']
     fieldsets = (
         ('Personal Information', {
             'fields': ('full_name', 'fathers_name', 'address', 'email_address', 'student_photo')
@@ -17,11 +22,30 @@ class StudentAdmin(admin.ModelAdmin):
             'fields': ('enrolled_date', 'course_name', 'course_duration', 'mode_of_learning', 'batch_schedule')
         }),
         ('Administrative', {
-            'fields': ('approve_status', 'instructor_name', 'created_at', 'updated_at')
+            'fields': ('approve_status', 'certificate_delivery', 'instructor_name', 'created_at', 'updated_at')
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        # Best matches first, unless a column was clicked to sort by
+        results = search_students(queryset, search_term)
+        if ORDER_VAR in request.GET:
+            results = results.order_by(*queryset.query.order_by)
+        return results, False
+
     def get_readonly_fields(self, request, obj=None):
         if obj:  # editing an existing object
             return self.readonly_fields + ('enrolled_date', 'course_name')
-        return self.readonly_fields
\ No newline at end of file
+        return self.readonly_fields
+
+    def _bulk_update_status(self, request, queryset, new_status):
+        changed = Student.bulk_update_status(queryset, new_status)
+        self.message_user(request, f"{len(changed)} student(s) marked as {new_status}. Notifications queued.")
+
+    @admin.action(description='Accept selected students')
+    def approve_selected(self, request, queryset):
+        self._bulk_update_status(request, queryset, 'accepted')
+
+    @admin.action(description='Reject selected students')
+    def reject_selected(self, request, queryset):
+        self._bulk_update_status(request, queryset, 'rejected')
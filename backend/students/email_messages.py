@@ -43,6 +43,20 @@ APPLICATION DECISION:
 - Review Date: {review_date}
 """
 
+STATUS_ACCEPTED_LINK_MESSAGE = """
+🎉 CONGRATULATIONS! Your application has been accepted!
+
+- Download your digital certificate (link valid until {link_expires}):
+  {download_url}
+- You can also preview your certificate and its QR code at any time:
+  {certificate_url}
+
+USE THE PREVIEW PAGE TO:
+- View your certificate online
+- Download a digital copy
+- Share with employers or on social media
+"""
+
 STATUS_ACCEPTED_MESSAGE = """
 🎉 CONGRATULATIONS! Your application has been accepted!
 
@@ -105,8 +119,8 @@ def format_registration_message(student):
     ).strip()
 
 
-def format_status_update_message(student, old_status, new_status):
-    """Format status update email message"""
+def format_status_update_message(student, old_status, new_status, download_link=None):
+    """Format status update email message (with the download link instead of attachment notes if given)"""
     # Base message
     message = STATUS_UPDATE_BASE.format(
         full_name=student.full_name,
@@ -123,7 +137,14 @@ def format_status_update_message(student, old_status, new_status):
         if hasattr(student, 'certificate'):
             certificate_url = student.certificate.get_certificate_url()
 
-        message += STATUS_ACCEPTED_MESSAGE.format(certificate_url=certificate_url)
+        if download_link is not None:
+            message += STATUS_ACCEPTED_LINK_MESSAGE.format(
+                download_url=download_link.get_absolute_url(),
+                link_expires=download_link.expires_at.strftime('%B %d, %Y'),
+                certificate_url=certificate_url,
+            )
+        else:
+            message += STATUS_ACCEPTED_MESSAGE.format(certificate_url=certificate_url)
 
         # message += STATUS_ACCEPTED_MESSAGE
     elif student.approve_status == 'rejected':
@@ -1,7 +1,7 @@
-from django.core.mail import send_mail, EmailMessage
+from django.core.mail import EmailMessage, EmailMultiAlternatives
 from django.conf import settings
 from django.template.loader import render_to_string
-import os
+import logging
 
 from .email_messages import (
     format_registration_message,
@@ -10,75 +10,152 @@ from .email_messages import (
     get_status_update_subject
 )
 
+logger = logging.getLogger(__name__)
 
-def send_registration_email(student):
-    """Send email notification when student registers successfully"""
+
+def build_registration_email(student):
+    """Build the registration confirmation email (plain text with an HTML alternative)"""
 
     # HTML message
     html_message = render_to_string('students/emails/registration_received.html', {
         'student': student,
     })
 
-    try:
-        send_mail(
-            subject=REGISTRATION_EMAIL_SUBJECT,
-            message=format_registration_message(student),
-            html_message=html_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[student.email_address],
-            fail_silently=False,
-        )
-        print(f"Registration email sent to: {student.email_address}")
-        return True
-    except Exception as e:
-        print(f"Error sending registration email to {student.email_address}: {e}")
-        return False
+    email = EmailMultiAlternatives(
+        subject=REGISTRATION_EMAIL_SUBJECT,
+        body=format_registration_message(student),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[student.email_address],
+    )
+    email.attach_alternative(html_message, 'text/html')
+    return email
 
 
-def send_status_update_email(student, old_status, new_status):
-    """Send email notification when application status changes"""
+def send_registration_email(student):
+    """
+    Queue the registration confirmation email in the outbox.
+
+    Call inside the transaction that saves the student, the email is only sent
+    (by dispatch_emails) if that transaction commits. Errors are not caught: a
+    failed insert must fail the save instead of silently rolling it back.
+    """
+    from jobs.outbox import OutboxService
+
+    OutboxService.queue_email(build_registration_email(student))
+    logger.info("Registration email queued for: %s", student.email_address)
+
+
+def send_registration_emails(students):
+    """
+    Queue registration emails for many students (e.g. an import) with one bulk insert.
+
+    Call inside the transaction that creates the students.
+    """
+    from jobs.outbox import OutboxService
+
+    OutboxService.queue_emails([build_registration_email(student) for student in students])
+    logger.info("Registration emails queued for %d student(s)", len(students))
+
+
+def build_status_update_email(student, old_status, new_status, download_link=None):
+    """
+    Build the status update EmailMessage.
+
+    When accepted, the email carries download_link (a CertificateDownloadLink) if given,
+    otherwise the QR code is attached.
+    """
 
     # HTML message
     html_message = render_to_string('students/emails/status_updated.html', {
         'student': student,
         'old_status': old_status,
         'new_status': new_status,
+        'download_link': download_link,
     })
 
-    try:
-        email = EmailMessage(
-            subject=get_status_update_subject(student.get_approve_status_display()),
-            body=format_status_update_message(student, old_status, new_status),
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[student.email_address],
+    email = EmailMessage(
+        subject=get_status_update_subject(student.get_approve_status_display()),
+        body=format_status_update_message(student, old_status, new_status, download_link),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[student.email_address],
+    )
+
+    # Set HTML content
+    email.content_subtype = "html"
+    email.body = html_message
+
+    # Attach QR code if status is accepted and certificate exists (and no link is sent)
+    if new_status == 'accepted' and hasattr(student, 'certificate') and download_link is None:
+        certificate = student.certificate
+
+        # Attach QR code (stored, only generated on first use)
+        email.attach(
+            f'certificate_qr_{certificate.certificate_number}.png',
+            certificate.get_qr_code_png(),
+            'image/png'
         )
 
-        # Set HTML content
-        email.content_subtype = "html"
-        email.body = html_message
+    return email
 
-        # Attach certificate PDF if status is accepted and certificate exists
-        if new_status == 'accepted' and hasattr(student, 'certificate'):
-            certificate = student.certificate
 
-            # Attach certificate file
-            if certificate.certificate_file and os.path.exists(certificate.certificate_file.path):
-                email.attach_file(certificate.certificate_file.path)
+def get_certificate_attachments(student, new_status):
+    """(filename, storage_name, mimetype) of the certificate PDF to attach, read when the email is sent"""
+    if new_status != 'accepted' or not hasattr(student, 'certificate'):
+        return []
 
-            # Generate and attach QR code
-            qr_buffer = certificate.generate_qr_code()
-            email.attach(
-                f'certificate_qr_{certificate.certificate_number}.png',
-                qr_buffer.getvalue(),
-                'image/png'
-            )
+    certificate = student.certificate
+    certificate_file = certificate.certificate_file
+    if not certificate_file or not certificate_file.storage.exists(certificate_file.name):
+        return []
 
-        # Send email
-        email.send(fail_silently=False)
+    return [(f"certificate_{certificate.certificate_number}.pdf", certificate_file.name, 'application/pdf')]
 
-        print(f"Status update email sent to: {student.email_address}")
-        return True
-    except Exception as e:
-        print(f"Error sending status update email to {student.email_address}: {e}")
-        return False
 
+def send_status_update_email(student, old_status, new_status):
+    """
+    Queue the status update email in the outbox.
+
+    When accepted, the certificate is delivered as a signed download link or, if the
+    student prefers it (see Student.get_certificate_delivery), as attachments.
+    Call inside the transaction that stores the status change; errors propagate
+    so that the change fails with them.
+    """
+    from jobs.outbox import OutboxService
+
+    download_link = None
+    file_attachments = get_certificate_attachments(student, new_status)
+    if file_attachments and student.get_certificate_delivery() == 'link':
+        download_link = student.certificate.create_download_link(student.email_address)
+        file_attachments = []
+
+    email = build_status_update_email(student, old_status, new_status, download_link)
+    OutboxService.queue_email(email, file_attachments)
+
+    logger.info("Status update email queued for: %s", student.email_address)
+
+
+def send_status_update_emails(changes):
+    """
+    Queue status update emails for many students in one transaction.
+
+    Each email is queued in its own savepoint, so one failure rolls back only that
+    student's email and the rest of the batch is still committed.
+
+    Args:
+        changes: iterable of (student, old_status, new_status)
+
+    Returns:
+        list: students whose email could not be queued
+    """
+    from django.db import transaction
+
+    failed = []
+    with transaction.atomic():
+        for student, old_status, new_status in changes:
+            try:
+                with transaction.atomic():
+                    send_status_update_email(student, old_status, new_status)
+            except Exception:
+                logger.exception("Error queueing status update email for %s", student.email_address)
+                failed.append(student)
+    return failed
@@ -0,0 +1,148 @@
+"""
+Bulk student import from a CSV file and a ZIP archive of photos.
+
+The CSV has one row per student with the StudentForm field names as headers;
+its student_photo column names a file inside the ZIP. Rows are read one at a
+time, each photo is streamed out of the archive into a temporary file, and every
+row is validated with StudentForm. Valid rows are inserted with bulk_create in
+chunks, together with their registration emails (one outbox insert per chunk).
+"""
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.db import transaction
+import csv
+import io
+import mimetypes
+import shutil
+import zipfile
+
+from .emails import send_registration_emails
+from .forms import StudentForm
+from .models import Student
+from .stats import invalidate_status_counts
+
+IMPORT_CHUNK_SIZE = 200
+REQUIRED_COLUMNS = [name for name in StudentForm._meta.fields if name != 'batch_schedule']
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors = []  # (row number, message)
+
+    def add_error(self, row_number, message):
+        self.errors.append((row_number, message))
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+
+def open_csv(csv_file):
+    """Text reader over an uploaded or opened binary CSV file (a UTF-8 BOM is skipped)"""
+    if isinstance(csv_file, io.TextIOBase):
+        return csv_file
+    return io.TextIOWrapper(csv_file, encoding='utf-8-sig', newline='')
+
+
+def extract_photo(archive, name):
+    """Stream one photo out of the archive into a temporary upload, or None if it is missing"""
+    try:
+        info = archive.getinfo(name)
+    except KeyError:
+        return None
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    upload = TemporaryUploadedFile(name.rsplit('/', 1)[-1], content_type, info.file_size, None)
+    with archive.open(info) as member:
+        shutil.copyfileobj(member, upload)
+    upload.seek(0)
+    return upload
+
+
+def format_form_errors(form):
+    return '; '.join(
+        f"{field}: {' '.join(messages)}" if field != '__all__' else ' '.join(messages)
+        for field, messages in form.errors.items()
+    )
+
+
+def import_students(csv_file, photos_zip, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False, progress=None):
+    """
+    Validate and insert students from a CSV file and a ZIP of photos.
+
+    Args:
+        csv_file: Binary (or text) file with the student rows
+        photos_zip: Path or seekable binary file of the photo archive
+        chunk_size: Rows inserted per bulk_create (and per outbox insert)
+        dry_run: Only validate, insert nothing
+        progress: Optional callback progress(rows_read, created, failed)
+
+    Returns:
+        ImportResult: number of created students and (row number, message) per rejected row
+    """
+    result = ImportResult()
+    reader = csv.DictReader(open_csv(csv_file))
+
+    missing = [name for name in REQUIRED_COLUMNS if name not in (reader.fieldnames or [])]
+    if missing:
+        result.add_error(1, f"Missing columns: {', '.join(missing)}")
+        return result
+
+    with zipfile.ZipFile(photos_zip) as archive:
+        chunk = []
+        row_number = 1
+        for row_number, row in enumerate(reader, start=2):  # row 1 is the header
+            data = {name: (row.get(name) or '').strip() for name in StudentForm._meta.fields}
+            photo_name = data.pop('student_photo')
+
+            photo = extract_photo(archive, photo_name) if photo_name else None
+            if photo is None:
+                result.add_error(row_number, f"student_photo: '{photo_name}' not found in the archive")
+                continue
+
+            form = StudentForm(data=data, files={'student_photo': photo})
+            if not form.is_valid():
+                photo.close()
+                result.add_error(row_number, format_form_errors(form))
+                continue
+
+            student = form.save(commit=False)
+            if student.mode_of_learning == 'online':
+                student.batch_schedule = None
+            chunk.append((student, photo))
+
+            if len(chunk) >= chunk_size:
+                result.created += _insert_chunk(chunk, dry_run)
+                chunk = []
+                if progress:
+                    progress(row_number - 1, result.created, result.failed)
+
+        if chunk:
+            result.created += _insert_chunk(chunk, dry_run)
+        if progress:
+            progress(row_number - 1, result.created, result.failed)
+
+    return result
+
+
+def _insert_chunk(chunk, dry_run):
+    """Insert one chunk of validated students with their registration emails, then drop the temp files"""
+    students = [student for student, _ in chunk]
+    try:
+        if dry_run:
+            return len(students)
+
+        # Certificate photo derivatives, normally built by Student.save
+        for student in students:
+            student.update_certificate_photo()
+
+        with transaction.atomic():
+            # Photos are written to storage as each row is inserted (FileField.pre_save)
+            students = Student.objects.bulk_create(students)
+            send_registration_emails(students)
+            invalidate_status_counts()
+
+        return len(students)
+    finally:
+        for _, photo in chunk:
+            photo.close()
@@ -0,0 +1,117 @@
+"""
+Pooled mail connection for student notification emails.
+
+Opening an SMTP connection (TCP, TLS handshake, login) costs more than sending a
+message, so each thread keeps one authenticated connection from get_connection()
+open between sends. A connection is checked with NOOP after it has been idle for a
+while, replaced once it is stale or has sent EMAIL_POOL_MAX_MESSAGES messages, and
+reopened once if a send fails because the server dropped it.
+"""
+from django.conf import settings
+from django.core.mail import get_connection
+import smtplib
+import threading
+import time
+
+# Idle time after which the connection is checked with NOOP before reuse
+NOOP_AFTER_IDLE = 30
+
+# Errors meaning the server dropped the connection before the message was accepted
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+
+class MailConnectionPool:
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._metrics = {
+            'sent': 0,
+            'failed': 0,
+            'connections_opened': 0,
+            'reconnects': 0,
+            'send_seconds': 0.0,
+            'last_send_seconds': 0.0,
+        }
+
+    def _count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self._metrics[key] += value
+
+    def _open(self):
+        connection = get_connection()
+        connection.open()
+        self._local.connection = connection
+        self._local.last_used = time.monotonic()
+        self._local.messages = 0
+        self._count(connections_opened=1)
+        return connection
+
+    def _is_alive(self, connection):
+        smtp = getattr(connection, 'connection', None)
+        if smtp is None:
+            # Not an SMTP backend (console, locmem, ...), nothing to go stale
+            return True
+        try:
+            return smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def get_connection(self):
+        """Return this thread's open connection, replacing it if it is stale or used up"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            return self._open()
+
+        idle = time.monotonic() - self._local.last_used
+        if (idle > settings.EMAIL_POOL_MAX_IDLE
+                or self._local.messages >= settings.EMAIL_POOL_MAX_MESSAGES
+                or (idle > NOOP_AFTER_IDLE and not self._is_alive(connection))):
+            self.close()
+            self._count(reconnects=1)
+            return self._open()
+
+        return connection
+
+    def close(self):
+        """Close this thread's connection, if any"""
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def send(self, message):
+        """Send one EmailMessage over the pooled connection, reconnecting once if it was dropped"""
+        started = time.monotonic()
+        try:
+            try:
+                sent = self.get_connection().send_messages([message])
+            except RECONNECT_ERRORS:
+                self.close()
+                self._count(reconnects=1)
+                sent = self.get_connection().send_messages([message])
+        except Exception:
+            self._count(failed=1)
+            self.close()
+            raise
+
+        elapsed = time.monotonic() - started
+        self._local.last_used = time.monotonic()
+        self._local.messages += 1
+        self._count(sent=sent, send_seconds=elapsed)
+        with self._lock:
+            self._metrics['last_send_seconds'] = elapsed
+        return sent
+
+    def stats(self):
+        """Send counters and timings, including the average seconds per sent message"""
+        with self._lock:
+            stats = dict(self._metrics)
+        stats['avg_send_seconds'] = stats['send_seconds'] / stats['sent'] if stats['sent'] else 0.0
+        return stats
+
+
+mail_pool = MailConnectionPool()
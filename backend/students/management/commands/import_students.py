@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from students.imports import IMPORT_CHUNK_SIZE, import_students
+
+
+class Command(BaseCommand):
+    help = 'Import students from a CSV file and a ZIP archive of their photos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='CSV with StudentForm field names as headers')
+        parser.add_argument('photos_zip', help='ZIP archive holding the files named in the student_photo column')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE,
+                            help='Students inserted per batch')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Validate the rows without inserting anything')
+
+    def handle(self, *args, **options):
+        def progress(rows, created, failed):
+            self.stdout.write(f'{rows} rows read, {created} imported, {failed} rejected')
+
+        with open(options['csv_path'], 'rb') as csv_file:
+            result = import_students(csv_file, options['photos_zip'], chunk_size=options['chunk_size'],
+                                     dry_run=options['dry_run'], progress=progress)
+
+        for row_number, message in result.errors:
+            self.stdout.write(self.style.ERROR(f'Row {row_number}: {message}'))
+
+        verb = 'validated' if options['dry_run'] else 'imported'
+        self.stdout.write(self.style.SUCCESS(f'{result.created} student(s) {verb}, {result.failed} row(s) rejected'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:00
+
+import students.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='certificate_photo',
+            field=models.ImageField(blank=True, editable=False, help_text='Resized, EXIF-stripped copy of the student photo used on the certificate', null=True, upload_to=students.models.certificate_photo_upload_path),
+        ),
+    ]
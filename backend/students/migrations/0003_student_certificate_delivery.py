@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0002_student_certificate_photo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='certificate_delivery',
+            field=models.CharField(blank=True, choices=[('', 'Site default'), ('link', 'Download link'), ('attachment', 'Attachment')], default='', help_text='How the acceptance email delivers the certificate', max_length=10),
+        ),
+    ]
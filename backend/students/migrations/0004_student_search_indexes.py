@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_student_certificate_delivery'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='student',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('full_name', 'email_address', 'fathers_name', config='simple'), name='student_search_vector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['full_name'], name='student_full_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['email_address'], name='student_email_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
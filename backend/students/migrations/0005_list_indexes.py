@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_student_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['-created_at', '-id'], name='student_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['approve_status', '-created_at', '-id'], name='student_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('approve_status', 'pending')), fields=['-created_at', '-id'], name='student_pending_created_idx'),
+        ),
+    ]
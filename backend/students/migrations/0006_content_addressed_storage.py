@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 15:20
+
+import core.storage
+import django.core.validators
+import students.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0005_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='certificate_photo',
+            field=models.ImageField(blank=True, editable=False, help_text='Resized, EXIF-stripped copy of the student photo used on the certificate', max_length=255, null=True, storage=core.storage.content_storage, upload_to=students.models.certificate_photo_upload_path),
+        ),
+        migrations.AlterField(
+            model_name='student',
+            name='student_photo',
+            field=models.ImageField(help_text='Upload a JPG or PNG image', max_length=255, storage=core.storage.content_storage, upload_to=students.models.student_photo_upload_path, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png'])]),
+        ),
+    ]
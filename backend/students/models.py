@@ -1,15 +1,25 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
 from django.core.validators import FileExtensionValidator
-import os
 import uuid
 
-from .emails import send_registration_email, send_status_update_email
+from core.storage import content_storage
+from .photos import make_certificate_photo
+from .stats import invalidate_status_counts
 
 def student_photo_upload_path(instance, filename):
-    # This will create a path like: student_photos/full_name/filename
+    # Stored as student_photos/ab/cd/<sha256>.<ext> by the content storage
     ext = filename.split('.')[-1]
-    filename = f"photo.{ext}"
-    return os.path.join('student_photos', instance.full_name.replace(' ', '_'), filename)
+    return f"student_photos/photo.{ext}"
+
+
+def certificate_photo_upload_path(instance, filename):
+    # Derivative stored as certificate_photos/ab/cd/<sha256>.jpg
+    return 'certificate_photos/certificate_photo.jpg'
 
 
 class Student(models.Model):
@@ -24,6 +34,12 @@ class Student(models.Model):
         ('online', 'Online'),
     ]
 
+    CERTIFICATE_DELIVERY_CHOICES = [
+        ('', 'Site default'),
+        ('link', 'Download link'),
+        ('attachment', 'Attachment'),
+    ]
+
     COURSE_CHOICES = [
         ('web_development', 'Web Development'),
         ('data_science', 'Data Science'),
@@ -53,9 +69,20 @@ class Student(models.Model):
     instructor_name = models.CharField(max_length=100)
     student_photo = models.ImageField(
         upload_to=student_photo_upload_path,
+        storage=content_storage,
+        max_length=255,
         validators=[FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png'])],
         help_text="Upload a JPG or PNG image"
     )
+    certificate_photo = models.ImageField(
+        upload_to=certificate_photo_upload_path,
+        storage=content_storage,
+        max_length=255,
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Resized, EXIF-stripped copy of the student photo used on the certificate"
+    )
     email_address = models.EmailField()
 
     # Conditional Field
@@ -73,6 +100,14 @@ class Student(models.Model):
         default='pending'
     )
 
+    certificate_delivery = models.CharField(
+        max_length=10,
+        choices=CERTIFICATE_DELIVERY_CHOICES,
+        blank=True,
+        default='',
+        help_text="How the acceptance email delivers the certificate"
+    )
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -81,6 +116,19 @@ class Student(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Student'
         verbose_name_plural = 'Students'
+        indexes = [
+            # Applications list: newest first, optionally filtered by status (core.pagination keyset order)
+            models.Index(fields=['-created_at', '-id'], name='student_created_idx'),
+            models.Index(fields=['approve_status', '-created_at', '-id'], name='student_status_created_idx'),
+            # Pending is the review queue, a small and hot slice of the table
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(approve_status='pending'),
+                         name='student_pending_created_idx'),
+            # Used by students.search
+            GinIndex(SearchVector('full_name', 'email_address', 'fathers_name', config='simple'),
+                     name='student_search_vector_idx'),
+            GinIndex(fields=['full_name'], opclasses=['gin_trgm_ops'], name='student_full_name_trgm_idx'),
+            GinIndex(fields=['email_address'], opclasses=['gin_trgm_ops'], name='student_email_trgm_idx'),
+        ]
 
     def __str__(self):
         return f"{self.full_name} - {self.get_course_name_display()} - {self.approve_status}"
@@ -98,40 +146,203 @@ class Student(models.Model):
         """Return a formatted reference ID for display purposes"""
         return f"STU{self.id:06d}"
 
+    def get_certificate_delivery(self):
+        """'link' or 'attachment', falling back to settings.CERTIFICATE_EMAIL_DELIVERY"""
+        from django.conf import settings
+        return self.certificate_delivery or settings.CERTIFICATE_EMAIL_DELIVERY
+
+
+    def update_certificate_photo(self):
+        """Regenerate the certificate photo derivative from student_photo."""
+        if not self.student_photo:
+            self.certificate_photo = None
+            return
+
+        try:
+            content = make_certificate_photo(self.student_photo)
+            self.certificate_photo.save('certificate_photo.jpg', content, save=False)
+        except Exception as e:
+            print(f"Error creating certificate photo for {self.full_name}: {e}")
+            self.certificate_photo = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so save() can tell what changed without another query
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # What was just read (deferred fields loaded on access included) is the stored value
+        values = self._current_field_values()
+        if fields is not None:
+            names = set(fields)
+            values = {field.attname: values[field.attname] for field in self._meta.concrete_fields
+                      if field.attname in values and (field.attname in names or field.name in names)}
+        if getattr(self, '_loaded_values', None) is None:
+            self._loaded_values = {}
+        self._loaded_values.update(values)
+
+    def _current_field_values(self):
+        """
+        Current values of the concrete fields, in the same form from_db receives them.
+
+        Deferred fields (.only()/.defer()) are skipped, reading them would cost a query each.
+        """
+        deferred = self.get_deferred_fields()
+        values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            value = getattr(self, field.attname)
+            if isinstance(field, models.FileField):
+                value = value.name if value else value
+            values[field.attname] = value
+        return values
+
+    def get_loaded_values(self):
+        """Field values as last loaded from (or saved to) the database, for the fields that are not deferred"""
+        if self._state.adding:
+            return {}
+
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            loaded = self._loaded_values = {}
+
+        # Built by hand (nothing loaded), or deferred fields assigned since loading: fetch those once
+        deferred = self.get_deferred_fields()
+        missing = [field.attname for field in self._meta.concrete_fields
+                   if field.attname not in loaded and field.attname not in deferred]
+        if missing:
+            loaded.update(Student.objects.filter(pk=self.pk).values(*missing).first() or {})
+        return loaded
+
+    def get_changed_fields(self):
+        """Names of fields whose value differs from the database; every field for a new student"""
+        current = self._current_field_values()
+        if self._state.adding:
+            return set(current)
+
+        loaded = self.get_loaded_values()
+        return {name for name, value in current.items() if name in loaded and loaded[name] != value}
+
+    def get_old_status(self):
+        """approve_status as stored in the database ('pending' for a new student)"""
+        if self._state.adding:
+            return 'pending'
+        loaded = self.get_loaded_values()
+        if 'approve_status' not in loaded:
+            # Deferred and never assigned, so the stored value is the current one
+            return self.approve_status
+        return loaded['approve_status']
+
+    def handle_status_change(self, old_status):
+        """
+        Queue the side effects of a status transition.
+
+        Certificate generation runs in the background job worker (run_jobs), emails
+        go to the outbox (dispatch_emails). Call inside the transaction that stores
+        the new status.
+        """
+        from jobs.services import JobService
+        from .emails import send_status_update_email
+
+        if old_status == self.approve_status:
+            return
+
+        if self.approve_status == 'accepted':
+            # Generate certificate first, the status email is queued once it exists
+            JobService.enqueue('students.tasks.issue_certificate', student_id=self.pk,
+                               old_status=old_status, new_status=self.approve_status)
+        else:
+            # Status changed - send notification
+            send_status_update_email(self, old_status, self.approve_status)
+
+    @classmethod
+    def bulk_update_status(cls, students, new_status):
+        """
+        Set approve_status on many students in one transaction with a single bulk_update.
+
+        Transitions are worked out from the values the instances were loaded with.
+        Their side effects are queued as one batch job (students.tasks.process_status_changes)
+        that renders the certificates over one worker pool and queues the emails in the outbox.
+
+        Returns:
+            list: the students whose status actually changed
+        """
+        from certificates.verification import invalidate_student_certificates
+        from jobs.services import JobService
+
+        now = timezone.now()
+        changed = []
+        for student in students:
+            old_status = student.get_old_status()
+            if old_status != new_status:
+                student.approve_status = new_status
+                student.updated_at = now  # bulk_update does not apply auto_now
+                changed.append((student, old_status))
+
+        if not changed:
+            return []
+
+        with transaction.atomic():
+            cls.objects.bulk_update([student for student, _ in changed], ['approve_status', 'updated_at'])
+            invalidate_student_certificates([student.pk for student, _ in changed])
+            invalidate_status_counts()
+            for student, _ in changed:
+                student._loaded_values = student._current_field_values()
+
+            JobService.enqueue('students.tasks.process_status_changes', new_status=new_status,
+                               changes=[[student.pk, old_status] for student, old_status in changed])
+
+        return [student for student, _ in changed]
 
     def save(self, *args, **kwargs):
         # Check if this is a new student (registration)
         is_new = self._state.adding
 
-        # Get old status if updating
-        if not is_new:
-            try:
-                old_student = Student.objects.get(pk=self.pk)
-                old_status = old_student.approve_status
-            except Student.DoesNotExist:
-                old_status = 'pending'
-        else:
-            old_status = 'pending'
+        # Work out what changed from the values loaded with the instance (no extra query)
+        changed_fields = self.get_changed_fields()
+        old_status = self.get_old_status()
+
+        # Fields left deferred (.only()/.defer()) are not saved, don't load them here
+        deferred = self.get_deferred_fields()
 
         # Clear batch_schedule if mode is online
-        if self.mode_of_learning == 'online':
+        if 'batch_schedule' not in deferred and self.mode_of_learning == 'online':
             self.batch_schedule = None
 
-        # Save the student
-        super().save(*args, **kwargs)
+        # Build the certificate photo for new uploads (uncommitted files) or when it is missing
+        if ('student_photo' not in deferred and self.student_photo
+                and (not self.student_photo._committed or not self.certificate_photo)):
+            self.update_certificate_photo()
 
-        # Generate certificate when status changes to accepted
-        if not is_new and old_status != self.approve_status:
-            if self.approve_status == 'accepted' and old_status != 'accepted':
-                from certificates.services import CertificateService
-                CertificateService.create_certificate_for_student(self)
+        # Save the student together with its background jobs and outbox emails,
+        # so neither exists without the change
+        from certificates.verification import STUDENT_FIELDS, invalidate_student_certificate
+        from .emails import send_registration_email
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            if not is_new and changed_fields & set(STUDENT_FIELDS):
+                # Certificate pages show these student fields, drop their cached snapshot
+                invalidate_student_certificate(self)
+
+            if is_new or 'approve_status' in changed_fields:
+                invalidate_status_counts()
+
+            if is_new:
+                # New registration - send welcome/confirmation email
+                send_registration_email(self)
+            elif 'approve_status' in changed_fields:
+                self.handle_status_change(old_status)
+
+        self._loaded_values = self._current_field_values()
 
-        # Send emails based on the operation
-        if is_new:
-            # New registration - send welcome/confirmation email
-            send_registration_email(self)
-        else:
-            # Status changed - send notification (certificate should now be available)
-            if old_status != self.approve_status:
-                send_status_update_email(self, old_status, self.approve_status)
 
+@receiver(post_delete, sender=Student)
+def invalidate_deleted_student_counts(sender, instance, **kwargs):
+    """Deleted students (admin deletes included) change the status counts"""
+    invalidate_status_counts()
@@ -0,0 +1,46 @@
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+from io import BytesIO
+
+# The photo box on the certificate is 120pt x 120pt (see certificates.utils.draw_top_sub_container)
+CERTIFICATE_PHOTO_BOX_PT = 120
+CERTIFICATE_PHOTO_DPI = 300
+CERTIFICATE_PHOTO_MAX_PX = round(CERTIFICATE_PHOTO_BOX_PT / 72 * CERTIFICATE_PHOTO_DPI)
+CERTIFICATE_PHOTO_QUALITY = 85
+
+
+def make_certificate_photo(photo_file):
+    """
+    Build the certificate-ready derivative of an uploaded student photo.
+
+    Applies the EXIF orientation, drops all metadata and downsizes the image so it
+    fits the certificate photo box at CERTIFICATE_PHOTO_DPI.
+
+    Args:
+        photo_file: File or FieldFile holding the uploaded photo
+
+    Returns:
+        ContentFile: JPEG content of the derivative
+    """
+    photo_file.seek(0)
+    with Image.open(photo_file) as image:
+        image = ImageOps.exif_transpose(image)
+
+        # JPEG has no alpha channel, flatten transparent PNGs onto white
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        image.thumbnail((CERTIFICATE_PHOTO_MAX_PX, CERTIFICATE_PHOTO_MAX_PX), Image.LANCZOS)
+
+        buffer = BytesIO()
+        # No exif argument, so the derivative is saved without any EXIF data
+        image.save(buffer, format='JPEG', quality=CERTIFICATE_PHOTO_QUALITY, optimize=True,
+                   dpi=(CERTIFICATE_PHOTO_DPI, CERTIFICATE_PHOTO_DPI))
+
+    photo_file.seek(0)
+    return ContentFile(buffer.getvalue())
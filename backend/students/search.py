@@ -0,0 +1,64 @@
+"""
+Ranked search over student applications (Postgres).
+
+Names and emails are matched with full-text search (a GIN index on the same
+SearchVector expression as SEARCH_VECTOR) and with trigram similarity for typos
+and partial input (GIN gin_trgm_ops indexes on full_name and email_address).
+Reference IDs (STU000123 or the reference UUID) and certificate numbers are
+exact, indexed lookups.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db.models import F, Q, Value
+import re
+import uuid
+
+# Must match the expression of the student_search_vector_idx index
+SEARCH_CONFIG = 'simple'
+SEARCH_VECTOR = SearchVector('full_name', 'email_address', 'fathers_name', config=SEARCH_CONFIG)
+
+DISPLAY_REFERENCE_RE = re.compile(r'^STU0*(\d+)$', re.IGNORECASE)
+CERTIFICATE_NUMBER_RE = re.compile(r'^CERT-[\w-]+$', re.IGNORECASE)
+
+
+def search_students(queryset, query):
+    """
+    Filter and rank queryset by a search term, best matches first.
+
+    Args:
+        queryset: Student queryset (filters already applied)
+        query: Text typed by the admin
+
+    Returns:
+        QuerySet ordered by relevance (annotated with `rank`), or queryset unchanged for an empty query
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+
+    # Identifiers: exact matches, no ranking needed
+    match = DISPLAY_REFERENCE_RE.match(query)
+    if match:
+        return queryset.filter(pk=int(match.group(1))).annotate(rank=Value(1.0))
+    if CERTIFICATE_NUMBER_RE.match(query):
+        return queryset.filter(certificate__certificate_number=query.upper()).annotate(rank=Value(1.0))
+    try:
+        return queryset.filter(reference_id=uuid.UUID(query)).annotate(rank=Value(1.0))
+    except ValueError:
+        pass
+
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    return (
+        queryset
+        .annotate(search=SEARCH_VECTOR)
+        .filter(
+            Q(search=search_query)
+            | Q(full_name__trigram_similar=query)
+            | Q(email_address__trigram_similar=query)
+        )
+        .annotate(rank=(
+            SearchRank(F('search'), search_query)
+            + TrigramSimilarity('full_name', query)
+            + TrigramSimilarity('email_address', query)
+        ))
+        .order_by('-rank', '-created_at', '-pk')
+    )
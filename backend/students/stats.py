@@ -0,0 +1,40 @@
+"""
+Cached student status counters for the admin panel and home page.
+
+All counts come from one aggregate query with conditional counts, cached for
+STATUS_COUNTS_TIMEOUT seconds. The cache is dropped whenever a student is
+created, deleted or changes status, so the TTL only bounds changes made outside
+the ORM (raw SQL, .update()).
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+
+STATUS_COUNTS_CACHE_KEY = 'students:status_counts'
+STATUS_COUNTS_TIMEOUT = 60  # seconds
+
+
+def get_status_counts():
+    """
+    Student counts by approve_status.
+
+    Returns:
+        dict: total, pending, accepted and rejected counts
+    """
+    from .models import Student
+
+    counts = cache.get(STATUS_COUNTS_CACHE_KEY)
+    if counts is None:
+        counts = Student.objects.aggregate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(approve_status='pending')),
+            accepted=Count('id', filter=Q(approve_status='accepted')),
+            rejected=Count('id', filter=Q(approve_status='rejected')),
+        )
+        cache.set(STATUS_COUNTS_CACHE_KEY, counts, timeout=STATUS_COUNTS_TIMEOUT)
+    return counts
+
+
+def invalidate_status_counts():
+    """Drop the cached counts once the current transaction commits"""
+    transaction.on_commit(lambda: cache.delete(STATUS_COUNTS_CACHE_KEY))
@@ -0,0 +1,78 @@
+"""
+Background tasks for student side effects, run by the run_jobs worker (see jobs.services).
+"""
+from django.db import transaction
+import logging
+
+from .models import Student
+from .emails import send_status_update_email, send_status_update_emails
+
+logger = logging.getLogger(__name__)
+
+
+def issue_certificate(student_id, old_status, new_status):
+    """Generate the certificate for an accepted student, then queue the status email in the outbox."""
+    from certificates.services import CertificateService
+
+    student = Student.objects.get(pk=student_id)
+
+    # The student may have been moved out of accepted before the job ran
+    if student.approve_status != 'accepted':
+        return
+
+    certificate = CertificateService.create_certificate_for_student(student)
+    student.certificate = certificate
+    send_status_update_email(student, old_status, new_status)
+
+
+def send_status_email(student_id, old_status, new_status):
+    """Queue the status update email of one student whose email failed in a batch (retried until it is queued)."""
+    student = Student.objects.select_related('certificate').get(pk=student_id)
+
+    # Moved on since, the later change queues its own email
+    if student.approve_status != new_status:
+        return
+
+    send_status_update_email(student, old_status, new_status)
+
+
+def process_status_changes(new_status, changes):
+    """
+    Run the side effects of a bulk status update as one batch.
+
+    Certificates are rendered over one worker pool and the emails are queued in the
+    outbox together, for dispatch_emails to send in batches. Students whose
+    certificate or email fails get their own retrying job, so the rest of the batch
+    is not processed twice.
+
+    Args:
+        new_status: Status the students were moved to
+        changes: list of [student_id, old_status]
+    """
+    from certificates.services import CertificateService
+    from jobs.services import JobService
+
+    old_statuses = {student_id: old_status for student_id, old_status in changes}
+
+    # Students changed again since the bulk update are handled by their own jobs
+    student_ids = list(
+        Student.objects.filter(pk__in=old_statuses, approve_status=new_status).values_list('pk', flat=True)
+    )
+
+    if new_status == 'accepted':
+        failed = CertificateService.create_certificates_for_students(student_ids)
+        for student_id, error in failed.items():
+            logger.error("Error creating certificate for student %s: %s", student_id, error)
+            JobService.enqueue('students.tasks.issue_certificate', student_id=student_id,
+                               old_status=old_statuses[student_id], new_status=new_status)
+        student_ids = [student_id for student_id in student_ids if student_id not in failed]
+
+    students = Student.objects.select_related('certificate').filter(pk__in=student_ids)
+    with transaction.atomic():
+        failed_students = send_status_update_emails(
+            [(student, old_statuses[student.pk], new_status) for student in students]
+        )
+        # Committed together with the emails that were queued
+        for student in failed_students:
+            JobService.enqueue('students.tasks.send_status_email', student_id=student.pk,
+                               old_status=old_statuses[student.pk], new_status=new_status)
@@ -1,7 +1,27 @@
 from django.http import HttpResponse
 from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
 from django.core.mail import send_mail
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from datetime import date
+from PIL import Image
+from unittest import mock
+import csv
+import io
+import shutil
 import smtplib
+import tempfile
+import zipfile
+
+from jobs.models import Job, OutboxEmail
+
+from . import emails, imports, tasks
+from .models import Student
+
+# Keep the cache out of the query counts
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
 
 
 def test_email_config(request):
@@ -97,3 +117,354 @@ This is a debug test email."""
 
     return HttpResponse('<pre>' + '\n'.join(debug_info) + '</pre>')
 
+
+def create_student(**fields):
+    values = {
+        'full_name': 'Test Student',
+        'fathers_name': 'Test Father',
+        'address': 'Kathmandu',
+        'enrolled_date': date(2025, 1, 1),
+        'course_name': 'web_development',
+        'course_duration': '3 months',
+        'mode_of_learning': 'online',
+        'instructor_name': 'Instructor',
+        'email_address': 'student@example.com',
+    }
+    values.update(fields)
+    return Student.objects.create(**values)
+
+
+def selects(queries):
+    return [query['sql'] for query in queries if query['sql'].lstrip().upper().startswith('SELECT')]
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class StudentChangeTrackingTests(TestCase):
+    def setUp(self):
+        self.student = create_student()
+
+    def test_new_student_changes_every_field(self):
+        student = Student(full_name='New')
+        self.assertIn('full_name', student.get_changed_fields())
+        self.assertEqual(student.get_old_status(), 'pending')
+
+    def test_changed_fields_from_loaded_values(self):
+        student = Student.objects.get(pk=self.student.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(student.get_changed_fields(), set())
+            student.full_name = 'Renamed'
+            student.approve_status = 'rejected'
+            self.assertEqual(student.get_changed_fields(), {'full_name', 'approve_status'})
+            self.assertEqual(student.get_old_status(), 'pending')
+
+    def test_save_runs_no_select(self):
+        student = Student.objects.get(pk=self.student.pk)
+        student.email_address = 'new@example.com'
+        # Savepoint, UPDATE, release
+        with self.assertNumQueries(3):
+            student.save()
+        self.assertEqual(student.get_changed_fields(), set())
+
+    def test_status_change_save_runs_no_select(self):
+        student = Student.objects.get(pk=self.student.pk)
+        student.approve_status = 'rejected'
+        # Savepoint, UPDATE, outbox INSERT, release
+        with self.assertNumQueries(4):
+            student.save()
+        self.assertEqual(OutboxEmail.objects.filter(to=[student.email_address]).count(), 2)
+
+    def test_accepting_queues_certificate_job(self):
+        student = Student.objects.get(pk=self.student.pk)
+        student.approve_status = 'accepted'
+        with CaptureQueriesContext(connection) as queries:
+            student.save()
+        self.assertEqual(selects(queries.captured_queries), [])
+        job = Job.objects.get(task='students.tasks.issue_certificate')
+        self.assertEqual(job.payload, {'student_id': student.pk, 'old_status': 'pending', 'new_status': 'accepted'})
+
+    def test_unchanged_save_after_save(self):
+        student = Student.objects.get(pk=self.student.pk)
+        student.approve_status = 'rejected'
+        student.save()
+        queued = OutboxEmail.objects.count()
+        # The second save sees no status change, so no second email
+        with self.assertNumQueries(3):
+            student.save()
+        self.assertEqual(OutboxEmail.objects.count(), queued)
+
+    def test_only_instance_skips_deferred_fields(self):
+        student = Student.objects.only('id', 'full_name', 'approve_status').get(pk=self.student.pk)
+        student.full_name = 'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(student.get_changed_fields(), {'full_name'})
+            student.save()
+        self.assertEqual(selects(queries.captured_queries), [])
+        self.assertEqual(student.get_deferred_fields(), {
+            field.attname for field in Student._meta.concrete_fields
+        } - {'id', 'full_name', 'approve_status'})
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.full_name, 'Renamed')
+        self.assertEqual(self.student.address, 'Kathmandu')
+
+    def test_defer_instance_skips_deferred_fields(self):
+        student = Student.objects.defer('address', 'fathers_name').get(pk=self.student.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(student.get_changed_fields(), set())
+            self.assertEqual(student.get_old_status(), 'pending')
+
+    def test_assigned_deferred_field_is_fetched_once(self):
+        student = Student.objects.only('id', 'full_name').get(pk=self.student.pk)
+        student.approve_status = 'rejected'
+        with self.assertNumQueries(1):
+            self.assertEqual(student.get_old_status(), 'pending')
+            self.assertEqual(student.get_changed_fields(), {'approve_status'})
+        with CaptureQueriesContext(connection) as queries:
+            student.save()
+        # The status email loads the deferred fields it shows, approve_status is not read again
+        self.assertFalse([sql for sql in selects(queries.captured_queries) if 'approve_status' in sql])
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+
+    def test_deferred_field_read_counts_as_loaded(self):
+        Student.objects.filter(pk=self.student.pk).update(approve_status='accepted')
+        student = Student.objects.only('id', 'full_name').get(pk=self.student.pk)
+        # Reading the deferred status loads it, after that it is known without another query
+        with self.assertNumQueries(1):
+            self.assertEqual(student.get_old_status(), 'accepted')
+            self.assertEqual(student.get_loaded_values()['approve_status'], 'accepted')
+            self.assertEqual(student.get_changed_fields(), set())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkUpdateStatusTests(TestCase):
+    def setUp(self):
+        self.pending = create_student(email_address='pending@example.com')
+        self.accepted = create_student(email_address='accepted@example.com')
+        self.rejected = create_student(email_address='rejected@example.com')
+        Student.objects.filter(pk=self.accepted.pk).update(approve_status='accepted')
+        Student.objects.filter(pk=self.rejected.pk).update(approve_status='rejected')
+
+    def load(self):
+        return list(Student.objects.order_by('pk'))
+
+    def test_updates_only_transitions(self):
+        students = self.load()
+        # Savepoint, one bulk UPDATE, job INSERT, release
+        with self.assertNumQueries(4):
+            changed = Student.bulk_update_status(students, 'rejected')
+
+        self.assertEqual([student.pk for student in changed], [self.pending.pk, self.accepted.pk])
+        self.assertEqual(set(Student.objects.values_list('approve_status', flat=True)), {'rejected'})
+        job = Job.objects.get(task='students.tasks.process_status_changes')
+        self.assertEqual(job.payload, {
+            'new_status': 'rejected',
+            'changes': [[self.pending.pk, 'pending'], [self.accepted.pk, 'accepted']],
+        })
+
+    def test_updated_instances_are_clean(self):
+        students = self.load()
+        Student.bulk_update_status(students, 'accepted')
+        for student in students:
+            self.assertEqual(student.get_changed_fields(), set())
+            self.assertEqual(student.get_old_status(), 'accepted')
+
+    def test_no_transitions(self):
+        students = [student for student in self.load() if student.approve_status == 'rejected']
+        with self.assertNumQueries(0):
+            self.assertEqual(Student.bulk_update_status(students, 'rejected'), [])
+        self.assertFalse(Job.objects.exists())
+
+    def test_only_instances(self):
+        students = list(Student.objects.only('id', 'approve_status').order_by('pk'))
+        with CaptureQueriesContext(connection) as queries:
+            changed = Student.bulk_update_status(students, 'pending')
+        self.assertEqual(selects(queries.captured_queries), [])
+        self.assertEqual([student.pk for student in changed], [self.accepted.pk, self.rejected.pk])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProcessStatusChangesTests(TestCase):
+    def setUp(self):
+        self.students = [create_student(email_address=f'student{i}@example.com') for i in range(3)]
+        Student.objects.update(approve_status='rejected')
+        OutboxEmail.objects.all().delete()
+        self.changes = [[student.pk, 'pending'] for student in self.students]
+
+    def test_failed_email_gets_retrying_job(self):
+        send_status_update_email = emails.send_status_update_email
+        failing = self.students[1]
+
+        def send(student, old_status, new_status):
+            if student.pk == failing.pk:
+                raise RuntimeError('template error')
+            send_status_update_email(student, old_status, new_status)
+
+        with mock.patch.object(emails, 'send_status_update_email', send), \
+                self.assertLogs('students.emails', 'ERROR'):
+            tasks.process_status_changes('rejected', self.changes)
+
+        self.assertEqual(sorted(email.to[0] for email in OutboxEmail.objects.all()),
+                         ['student0@example.com', 'student2@example.com'])
+        job = Job.objects.get(task='students.tasks.send_status_email')
+        self.assertEqual(job.payload, {'student_id': failing.pk, 'old_status': 'pending', 'new_status': 'rejected'})
+
+        # The retry queues the email once the error is gone
+        tasks.send_status_email(**job.payload)
+        self.assertTrue(OutboxEmail.objects.filter(to=[failing.email_address]).exists())
+
+    def test_retry_skips_students_changed_since(self):
+        Student.objects.filter(pk=self.students[0].pk).update(approve_status='pending')
+        tasks.send_status_email(self.students[0].pk, 'pending', 'rejected')
+        self.assertFalse(OutboxEmail.objects.exists())
+
+
+def make_jpeg(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (60, 80), color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def make_csv(rows, columns=None):
+    columns = columns or imports.REQUIRED_COLUMNS + ['batch_schedule']
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(rows)
+    return io.BytesIO(buffer.getvalue().encode('utf-8'))
+
+
+def import_row(number, **fields):
+    row = {
+        'full_name': f'Student {number}',
+        'fathers_name': 'Test Father',
+        'address': 'Kathmandu',
+        'enrolled_date': '2025-01-01',
+        'course_name': 'web_development',
+        'course_duration': '3 months',
+        'mode_of_learning': 'online',
+        'batch_schedule': '',
+        'instructor_name': 'Instructor',
+        'student_photo': f'photos/{number}.jpg',
+        'email_address': f'student{number}@example.com',
+    }
+    row.update(fields)
+    return row
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ImportStudentsTests(TestCase):
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        storages = override_settings(STORAGES={
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'content': {'BACKEND': 'core.storage.ContentAddressedFileSystemStorage', 'OPTIONS': {'location': location}},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        })
+        storages.enable()
+        self.addCleanup(storages.disable)
+
+    def run_import(self, rows, photos=None, **kwargs):
+        if photos is None:
+            photos = {row['student_photo']: make_jpeg((i * 40 % 256, 0, 0)) for i, row in enumerate(rows)}
+        return imports.import_students(make_csv(rows), make_zip(photos), **kwargs)
+
+    def test_valid_rows_are_created(self):
+        result = self.run_import([import_row(1), import_row(2)])
+
+        self.assertEqual((result.created, result.errors), (2, []))
+        student = Student.objects.get(email_address='student1@example.com')
+        self.assertTrue(student.student_photo.name.startswith('student_photos/'))
+        self.assertTrue(student.certificate_photo.name.startswith('certificate_photos/'))
+        self.assertTrue(student.student_photo.storage.exists(student.student_photo.name))
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+
+    def test_invalid_rows_are_reported_per_row(self):
+        rows = [
+            import_row(1),
+            import_row(2, email_address='not-an-email'),
+            import_row(3, course_name='astrology'),
+            import_row(4, mode_of_learning='physical'),
+            import_row(5, student_photo='photos/missing.jpg'),
+            import_row(6),
+        ]
+        photos = {f'photos/{i}.jpg': make_jpeg((i * 40, 0, 0)) for i in (1, 2, 3, 4, 6)}
+
+        result = self.run_import(rows, photos)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual([row_number for row_number, _ in result.errors], [3, 4, 5, 6])
+        messages = dict(result.errors)
+        self.assertIn('email_address', messages[3])
+        self.assertIn('course_name', messages[4])
+        self.assertIn('batch_schedule', messages[5])
+        self.assertEqual(messages[6], "student_photo: 'photos/missing.jpg' not found in the archive")
+        self.assertEqual(sorted(Student.objects.values_list('full_name', flat=True)), ['Student 1', 'Student 6'])
+
+    def test_not_an_image_is_rejected(self):
+        result = self.run_import([import_row(1)], {'photos/1.jpg': b'not an image'})
+        self.assertEqual(result.created, 0)
+        self.assertIn('student_photo', result.errors[0][1])
+
+    def test_missing_columns(self):
+        result = imports.import_students(make_csv([import_row(1)], columns=['full_name', 'email_address']),
+                                         make_zip({}))
+        self.assertEqual(result.created, 0)
+        self.assertEqual(result.errors[0][0], 1)
+        self.assertIn('student_photo', result.errors[0][1])
+
+    def test_photos_are_streamed_from_the_archive(self):
+        content = make_jpeg((0, 128, 0))
+        with zipfile.ZipFile(make_zip({'photos/1.jpg': content})) as archive:
+            photo = imports.extract_photo(archive, 'photos/1.jpg')
+            self.assertIsNone(imports.extract_photo(archive, 'photos/missing.jpg'))
+        self.addCleanup(photo.close)
+
+        # Copied into a temporary file on disk, not held in memory
+        self.assertIsInstance(photo, TemporaryUploadedFile)
+        self.assertEqual((photo.name, photo.content_type, photo.size), ('1.jpg', 'image/jpeg', len(content)))
+        self.assertEqual(photo.read(), content)
+
+    def test_import_does_not_read_whole_members(self):
+        with mock.patch.object(zipfile.ZipFile, 'read', side_effect=AssertionError('read into memory')):
+            result = self.run_import([import_row(1)])
+        self.assertEqual(result.created, 1)
+
+    def test_identical_photos_are_stored_once(self):
+        content = make_jpeg((0, 0, 255))
+        rows = [import_row(1), import_row(2, student_photo='photos/copy.jpg')]
+
+        result = self.run_import(rows, {'photos/1.jpg': content, 'photos/copy.jpg': content})
+
+        self.assertEqual(result.created, 2)
+        first, second = Student.objects.order_by('pk')
+        self.assertEqual(first.student_photo.name, second.student_photo.name)
+        self.assertEqual(first.certificate_photo.name, second.certificate_photo.name)
+
+    def test_rows_are_inserted_in_chunks(self):
+        rows = [import_row(i) for i in range(1, 6)]
+        progress = mock.Mock()
+
+        with mock.patch.object(Student.objects, 'bulk_create', wraps=Student.objects.bulk_create) as bulk_create:
+            result = self.run_import(rows, chunk_size=2, progress=progress)
+
+        self.assertEqual(result.created, 5)
+        self.assertEqual([len(call.args[0]) for call in bulk_create.call_args_list], [2, 2, 1])
+        self.assertEqual([call.args for call in progress.call_args_list], [(2, 2, 0), (4, 4, 0), (5, 5, 0)])
+        self.assertEqual(OutboxEmail.objects.count(), 5)
+
+    def test_dry_run_inserts_nothing(self):
+        result = self.run_import([import_row(1), import_row(2, email_address='bad')], dry_run=True)
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.failed, 1)
+        self.assertFalse(Student.objects.exists())
+        self.assertFalse(OutboxEmail.objects.exists())
@@ -12,7 +12,7 @@ def student_registration(request):
     if request.method == 'POST':
         form = StudentForm(request.POST, request.FILES)
         if form.is_valid():
-            student = form.save()  # The email will be sent automatically via the model's save method
+            student = form.save()  # The email is queued automatically via the model's save method
 
             messages.success(request,
                              'Your registration has been submitted successfully! We will review your application and contact you soon.')